@@ -0,0 +1,79 @@
+import numpy as np
+
+
+# Function to build the students x questions score matrix (NaN where no mark was entered)
+def score_matrix(student_data, columns, dtype=np.float64):
+    if not columns:
+        return np.empty((len(student_data), 0), dtype=dtype)
+    return student_data[columns].to_numpy(dtype=dtype, na_value=np.nan)
+
+
+# Function to build the marks vector and the questions x COs incidence matrix of a paper.
+# co_index and question_index map the labels ("CO3", "Q.2") to their rows and columns;
+# incidence[q, c] counts how often CO c is tagged on question q.  Questions and COs
+# outside the indexes are left out.
+def question_vectors(question_data, co_index, question_index):
+    marks = np.zeros(len(question_index))
+    incidence = np.zeros((len(question_index), len(co_index)))
+    for qdata in question_data:
+        row = question_index.get(f"Q.{qdata['question_number']}")
+        if row is None:
+            continue
+        marks[row] = qdata['marks']
+        for co in qdata['cos']:
+            if co in co_index:
+                incidence[row, co_index[co]] += 1
+    return marks, incidence
+
+
+# Students count as appeared if any question has a mark >= 0
+def appeared_mask(scores):
+    return (scores >= 0).any(axis=1)
+
+
+# Number of students with marks > 0 on each question
+def attempt_counts(scores):
+    return np.count_nonzero(scores > 0, axis=0)
+
+
+# Marks scored on each question by the students who appeared
+def question_totals(scores, appeared):
+    return np.nansum(np.where(appeared[:, None], scores, 0), axis=0)
+
+
+# Total marks asked per CO (a question tagged twice with a CO counts twice)
+def co_marks_vector(marks, incidence):
+    return marks @ incidence
+
+
+# Per-CO sum of (marks of a question * students who attempted it)
+def co_weighted_totals(marks, incidence, attempts):
+    return (marks * attempts) @ (incidence > 0)
+
+
+# Metric 1 = weighted total / marks asked per CO, Metric 2 = Metric 1 / students appeared
+def co_metrics(weighted, co_marks, total_students):
+    metric_1 = np.divide(weighted, co_marks, out=np.zeros(len(weighted)), where=co_marks != 0)
+    metric_2 = metric_1 / total_students if total_students else np.zeros(len(weighted))
+    return metric_1, metric_2
+
+
+# Mean over an axis ignoring NaN, with NaN (and no warning) where every value is NaN
+def nan_mean(values, axis):
+    present = ~np.isnan(values)
+    sums = np.where(present, values, 0).sum(axis=axis)
+    counts = present.sum(axis=axis)
+    return np.divide(sums, counts, out=np.full(np.shape(sums), np.nan), where=counts > 0)
+
+
+# CO-PO metrics: every mapping cell times the Metric 2 of its CO.  Works for one course
+# (COs x POs) or a stack of courses (courses x COs x POs) with metric_2 shaped (..., COs).
+def co_po_metrics_matrix(mapping, metric_2):
+    return mapping * np.asarray(metric_2)[..., :, None]
+
+
+# Function to compute the PO averages, CO averages and the average of CO averages of a matrix
+def co_po_averages(values):
+    po_averages = nan_mean(values, axis=-2)
+    co_averages = nan_mean(values, axis=-1)
+    return po_averages, co_averages, nan_mean(co_averages, axis=-1)
@@ -0,0 +1,249 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from copo_compute import (
+    aggregate_marks_by_co,
+    read_student_workbook,
+    prepare_student_data,
+    calculate_totals,
+    student_totals_row,
+    generate_co_question_table,
+    generate_student_co_table,
+    generate_co_metrics_table,
+    load_co_po_mapping,
+    generate_co_po_metrics_table,
+    calculate_attainment,
+)
+from course_schema import CourseSchema
+from charts import CHART_FORMATS, course_charts, write_course_charts
+from exporters import course_tables, course_exports, add_course_to_zip, course_zip_names, open_report_zip
+from pdf_layout import layout_question_data
+from pdf_stream import stream_question_data
+from results_store import open_store, save_course_results
+
+MARKS_EXTENSIONS = (".xlsx", ".xls")
+MAPPING_SUFFIX = ".mapping.csv"
+
+# Manifest columns stored with each course in the results store
+STORE_KEYS = ("program", "academic_year", "batch", "semester")
+
+
+# Function to list the courses of a batch run from a manifest CSV or a directory
+def discover_courses(source, default_mapping=None):
+    if os.path.isfile(source):
+        return read_manifest(source, default_mapping)
+
+    courses = []
+    for file_name in sorted(os.listdir(source)):
+        stem, ext = os.path.splitext(file_name)
+        if ext.lower() != ".pdf":
+            continue
+
+        # Pair each question paper with a marks workbook of the same name
+        marks = next((os.path.join(source, stem + e) for e in MARKS_EXTENSIONS
+                      if os.path.exists(os.path.join(source, stem + e))), None)
+        if marks is None:
+            print(f"Skipping {stem}: no marks workbook found", file=sys.stderr)
+            continue
+
+        mapping = os.path.join(source, stem + MAPPING_SUFFIX)
+        courses.append({
+            "course_id": stem,
+            "pdf": os.path.join(source, file_name),
+            "marks": marks,
+            "mapping": mapping if os.path.exists(mapping) else default_mapping,
+        })
+    return courses
+
+
+# Function to read a manifest CSV with course_id, pdf, marks and optional mapping, program,
+# academic_year, batch and semester columns
+def read_manifest(manifest_path, default_mapping=None):
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    courses = []
+    with open(manifest_path, newline="") as f:
+        for row in csv.DictReader(f):
+            course = {key: (value or "").strip() for key, value in row.items()}
+            for key in ("pdf", "marks", "mapping"):
+                if course.get(key):
+                    course[key] = os.path.join(base_dir, course[key])
+            course["mapping"] = course.get("mapping") or default_mapping
+            courses.append(course)
+    return courses
+
+
+# Function to run the whole attainment pipeline for one course (runs inside a worker process)
+def process_course(course, pdf_workers=1, keep_tables=False, layout=False, charts_dir=None, chart_format="png",
+                   exports=False):
+    start = time.perf_counter()
+    record = {"course_id": course["course_id"]}
+    try:
+        if layout:
+            question_data = layout_question_data(course["pdf"])
+        else:
+            question_data = list(stream_question_data(course["pdf"], workers=pdf_workers))
+        co_marks = aggregate_marks_by_co(question_data)
+
+        student_data = read_student_workbook(course["marks"])
+        schema = CourseSchema.from_course(question_data, student_data.columns)
+        student_data = prepare_student_data(student_data, schema)
+        totals = calculate_totals(student_data)
+        students_attempted = schema.students_attempted(totals)
+
+        student_co_df = generate_student_co_table(co_marks, question_data, students_attempted, schema)
+        co_metrics_df = generate_co_metrics_table(co_marks, student_co_df, totals["Total Students Appeared"], schema)
+
+        attainment = None
+        co_po_mapping = co_po_metrics_df = None
+        if course.get("mapping"):
+            co_po_mapping = load_co_po_mapping(course["mapping"])
+            co_po_metrics_df = generate_co_po_metrics_table(co_po_mapping, co_metrics_df)
+            attainment = float(calculate_attainment(co_po_metrics_df, co_po_mapping))
+            if keep_tables:
+                # Handed back to the parent process for the results store, never checkpointed
+                record["tables"] = (co_metrics_df, co_po_metrics_df, co_po_mapping)
+
+        if charts_dir:
+            charts = course_charts(co_marks, co_metrics_df, co_po_metrics_df, chart_format)
+            write_course_charts(charts_dir, course["course_id"], charts, chart_format)
+
+        if exports:
+            # Results workbook and PDF report, handed back to the parent for the report zip
+            tables = course_tables(student_totals_row(student_data, totals),
+                                   generate_co_question_table(co_marks, question_data, schema), student_co_df,
+                                   co_metrics_df, co_po_mapping, co_po_metrics_df, attainment)
+            record["files"] = course_exports(course["course_id"], tables,
+                                             course_charts(co_marks, co_metrics_df, co_po_metrics_df))
+
+        record.update({
+            "status": "ok",
+            "questions": len(question_data),
+            "students": int(totals["Total Students Appeared"]),
+            "attainment": attainment,
+        })
+        for row in co_metrics_df.itertuples(index=False):
+            record[f"{row.CO} Metric 1"] = float(row[2])
+            record[f"{row.CO} Metric 2"] = float(row[3])
+    except Exception as e:
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+# Function to load the course ids that already finished in an earlier run
+def load_checkpoint(checkpoint_path):
+    records = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    records[record["course_id"]] = record
+    return records
+
+
+# Function to write the consolidated results file from all checkpointed records
+def write_results(records, output_path):
+    fieldnames = ["course_id", "status", "questions", "students", "attainment", "seconds"]
+    for record in records:
+        fieldnames.extend(key for key in record if key not in fieldnames and key != "error")
+    fieldnames.append("error")
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+
+# Function to process every course across a process pool, resuming from the checkpoint
+def run_batch(courses, output_path, workers=None, checkpoint_path=None, pdf_workers=1, store_path=None,
+              layout=False, charts_dir=None, chart_format="png", reports_path=None):
+    checkpoint_path = checkpoint_path or output_path + ".jsonl"
+    store = open_store(store_path) if store_path else None
+    reports = open_report_zip(reports_path) if reports_path else None
+    try:
+        by_id = {course["course_id"]: course for course in courses}
+        done = load_checkpoint(checkpoint_path)
+        # A finished course whose files are missing from the report zip (e.g. the run was
+        # killed before the archive was closed) is run again
+        archived = set(reports.namelist()) if reports is not None else set()
+        pending = [c for c in courses if done.get(c["course_id"], {}).get("status") != "ok"
+                   or (reports is not None and not archived.issuperset(course_zip_names(c["course_id"])))]
+
+        print(f"{len(courses)} courses, {len(courses) - len(pending)} already done, {len(pending)} to run")
+
+        start = time.perf_counter()
+        with open(checkpoint_path, "a") as checkpoint, ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_course, course, pdf_workers, store is not None, layout,
+                                   charts_dir, chart_format, reports is not None) for course in pending]
+            for count, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                tables = record.pop("tables", None)
+                if tables is not None:
+                    course = by_id[record["course_id"]]
+                    save_course_results(store, record["course_id"], *tables, record["attainment"],
+                                        **{key: course.get(key) or None for key in STORE_KEYS})
+                files = record.pop("files", None)
+                if files is not None:
+                    # Written as each course finishes, so finished reports are never held in memory
+                    add_course_to_zip(reports, record["course_id"], files)
+                done[record["course_id"]] = record
+
+                # Append every finished course so an interrupted run can resume
+                checkpoint.write(json.dumps(record) + "\n")
+                checkpoint.flush()
+
+                rate = record.get("students", 0) / record["seconds"] if record["seconds"] else 0
+                print(f"[{count}/{len(pending)}] {record['course_id']}: {record['status']} "
+                      f"in {record['seconds']:.2f}s ({rate:.0f} students/s)")
+    finally:
+        # Writes the archive's central directory, so the courses added so far stay readable
+        if reports is not None:
+            reports.close()
+
+    elapsed = time.perf_counter() - start
+    if pending:
+        print(f"Processed {len(pending)} courses in {elapsed:.2f}s ({len(pending) / elapsed:.2f} courses/s)")
+
+    ordered = [done[c["course_id"]] for c in courses if c["course_id"] in done]
+    write_results(ordered, output_path)
+    return ordered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute CO/PO attainment for many courses without the Streamlit UI.")
+    parser.add_argument("source", help="Directory of <course>.pdf + <course>.xlsx files, or a manifest CSV")
+    parser.add_argument("-o", "--output", default="attainment_results.csv", help="Consolidated results CSV")
+    parser.add_argument("--mapping", help="CO-PO mapping used for courses without their own mapping file")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--pdf-workers", type=int, default=1,
+                        help="Processes extracting the pages of each PDF in parallel (default: 1, serial)")
+    parser.add_argument("--layout", action="store_true",
+                        help="Read CO and marks from the columns of tabular question papers")
+    parser.add_argument("--charts", help="Directory for each course's CO marks, CO attainment and PO heat-map charts")
+    parser.add_argument("--chart-format", default="png", choices=sorted(CHART_FORMATS))
+    parser.add_argument("--reports", help="Zip archive of each course's results workbook and PDF report")
+    parser.add_argument("--store", help="SQLite results store that keeps per-course results for program roll-ups")
+    parser.add_argument("--checkpoint", help="Checkpoint file used to resume runs (default: <output>.jsonl)")
+    args = parser.parse_args(argv)
+
+    courses = discover_courses(args.source, args.mapping)
+    records = run_batch(courses, args.output, workers=args.workers, checkpoint_path=args.checkpoint,
+                        pdf_workers=args.pdf_workers, store_path=args.store, layout=args.layout,
+                        charts_dir=args.charts, chart_format=args.chart_format, reports_path=args.reports)
+    failed = [r for r in records if r["status"] != "ok"]
+    for record in failed:
+        print(f"{record['course_id']}: {record['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from copo_compute import (aggregate_marks_by_co, calculate_totals, generate_student_co_table,
+                          generate_co_metrics_table)
+from course_schema import CourseSchema
+
+SIZES = [(1_000, 5), (10_000, 5), (10_000, 50), (100_000, 5), (100_000, 50)]
+NUM_COS = 8
+REPEATS = 5
+
+
+# Function to build a random class: a marks table with ~10% blanks and a paper tagging 1-2 COs per question
+def make_inputs(num_students, num_questions, rng):
+    scores = rng.integers(0, 11, size=(num_students, num_questions)).astype(np.float64)
+    scores[rng.random(scores.shape) < 0.1] = np.nan
+    student_data = pd.DataFrame(scores, columns=[f"Q.{q + 1}" for q in range(num_questions)])
+    student_data.insert(0, "Enrollment_No", [f"EN{i:06d}" for i in range(num_students)])
+    student_data.insert(1, "FirstName", "Student")
+    student_data["Total"] = np.nansum(scores, axis=1)
+    question_data = [{'question_number': q + 1,
+                      'cos': [f"CO{c + 1}" for c in rng.choice(NUM_COS, size=rng.integers(1, 3), replace=False)],
+                      'marks': float(rng.choice([5.0, 10.0]))}
+                     for q in range(num_questions)]
+    return student_data, question_data
+
+
+# Function to compute the CO metrics the way the batch runner and the app's pipeline do
+def co_metrics_table(student_data, question_data, schema):
+    co_marks = aggregate_marks_by_co(question_data)
+    totals = calculate_totals(student_data)
+    student_co_df = generate_student_co_table(co_marks, question_data, schema.students_attempted(totals), schema)
+    return generate_co_metrics_table(co_marks, student_co_df, totals["Total Students Appeared"], schema)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'students':>9} {'questions':>9} {'best ms':>9} {'Mcells/s':>9}")
+    for num_students, num_questions in SIZES:
+        student_data, question_data = make_inputs(num_students, num_questions, rng)
+        schema = CourseSchema.from_course(question_data, student_data.columns)
+        timings = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            co_metrics_table(student_data, question_data, schema)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        cells = num_students * num_questions
+        print(f"{num_students:>9} {num_questions:>9} {best * 1000:>9.2f} {cells / best / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import cost matters: the light computation module, the CLIs and the app
+MODULES = ["question_tokenizer", "copo_compute", "attainment_core", "results_store", "batch_runner", "main17"]
+
+# Heavy libraries reported as loaded (or not) by each import
+HEAVY = ["numpy", "pandas", "fitz", "openpyxl", "matplotlib", "streamlit"]
+
+# Runs in a fresh interpreter: time one import and list the heavy libraries it pulled in
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+# Function to time a cold import of `module` in `repeats` fresh interpreters
+def time_import(module, repeats):
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+                                cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return min(run["seconds"] for run in runs), runs[-1]["loaded"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the calculator's modules.")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<20} {'best ms':>9}  heavy libraries loaded")
+    for module in args.modules:
+        seconds, loaded = time_import(module, args.repeats)
+        print(f"{module:<20} {seconds * 1000:>9.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import write_question_paper
+from pdf_stream import open_pdf, iter_page_texts, iter_page_texts_parallel, iter_questions
+
+
+# Function to time one extraction strategy, returning the best time and its question data
+def time_run(run, repeats):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = list(iter_questions(run()))
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and parallel per-page PDF text extraction.")
+    parser.add_argument("pdf", nargs="?", help="Question paper to extract (default: a generated question bank)")
+    parser.add_argument("--pages", type=int, default=200, help="Pages of the generated question bank")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(tmp, "question_bank.pdf")
+            write_question_paper(path, questions=args.pages * 8, cos=6, pages=args.pages)
+
+        serial, expected = time_run(lambda: iter_page_texts(open_pdf(path)), args.repeats)
+        print(f"{'mode':>8} {'workers':>7} {'best s':>8} {'speed-up':>8}  identical")
+        print(f"{'serial':>8} {1:>7} {serial:>8.3f} {1.0:>8.2f}  -")
+        for workers in sorted(set(args.workers)):
+            best, result = time_run(lambda: iter_page_texts_parallel(path, workers=workers), args.repeats)
+            print(f"{'process':>8} {workers:>7} {best:>8.3f} {serial / best:>8.2f}  {result == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_marks_table
+from attainment_core import appeared_mask, question_totals, score_matrix
+from copo_compute import (aggregate_marks_by_co, calculate_totals, generate_student_co_table,
+                          generate_co_metrics_table)
+from course_schema import CourseSchema
+from incremental import IncrementalAttainment
+
+
+# Function to make a random paper: each question tagged with one or two COs
+def make_question_data(questions, cos, rng):
+    return [{'question_number': i + 1,
+             'cos': [f"CO{c}" for c in rng.choice(np.arange(1, cos + 1), size=rng.integers(1, 3), replace=False)],
+             'marks': float(rng.integers(2, 11))}
+            for i in range(questions)]
+
+
+# Function to list the differences between the incremental state and a from-scratch
+# computation on the same marks table
+def compare(state, student_data, question_data, schema):
+    problems = []
+    totals = calculate_totals(student_data)
+    got = state.totals()
+    if got.keys() != totals.keys() or not np.allclose(list(got.values()), list(totals.values())):
+        problems.append(f"totals differ: {got} != {totals}")
+    scores = score_matrix(student_data, state.question_columns)
+    if not np.allclose(state.question_totals, question_totals(scores, appeared_mask(scores))):
+        problems.append("per-question totals differ")
+
+    co_marks = aggregate_marks_by_co(question_data)
+    student_co_df = generate_student_co_table(co_marks, question_data, schema.students_attempted(totals), schema)
+    expected = generate_co_metrics_table(co_marks, student_co_df, totals['Total Students Appeared'], schema)
+    actual = state.co_metrics_table()
+    columns = ['Sum of (Marks * No. of Students)', 'Metric 1', 'Metric 2']
+    if list(actual['CO']) != list(expected['CO']) or not np.allclose(actual[columns], expected[columns]):
+        problems.append("CO metrics differ from generate_co_metrics_table")
+    return problems
+
+
+# Function to run random adds, updates, deletes and whole-table syncs, checking after each
+def check_random_edits(rows, questions, cos, steps, seed):
+    rng = np.random.default_rng(seed)
+    question_data = make_question_data(questions, cos, rng)
+    student_data = make_marks_table(rows=rows, questions=questions, seed=seed)
+    # Real sheets have blank and repeated enrollment numbers
+    student_data.loc[::7, 'Enrollment_No'] = None
+    student_data.loc[1::5, 'Enrollment_No'] = student_data.loc[0, 'Enrollment_No']
+    schema = CourseSchema.from_course(question_data, student_data.columns)
+    columns = list(schema.questions)
+    student_data['Total'] = student_data[columns].sum(axis=1)
+
+    state = IncrementalAttainment.from_student_data(question_data, student_data, schema)
+    rows = list(range(len(student_data)))  # Row id of each row of the table
+    problems = compare(state, student_data, question_data, schema)
+    for step in range(steps):
+        operation = rng.choice(["add", "update", "delete", "sync"])
+        scores = np.where(rng.random(questions) < 0.2, np.nan, rng.integers(0, 11, questions).astype(float))
+        if operation == "add":
+            rows.append(state.add(dict(zip(columns, scores))))
+            student_data.loc[len(student_data)] = [None, "New"] + list(scores) + [np.nansum(scores)]
+        elif operation == "update" and len(student_data):
+            position = int(rng.integers(len(student_data)))
+            state.update(rows[position], list(scores))
+            student_data.loc[student_data.index[position], columns] = scores
+            student_data.loc[student_data.index[position], 'Total'] = np.nansum(scores)
+        elif operation == "delete" and len(student_data):
+            position = int(rng.integers(len(student_data)))
+            state.delete(rows.pop(position))
+            student_data = student_data.drop(index=student_data.index[position]).reset_index(drop=True)
+        else:
+            # A whole edited table, as the entry grid hands back on every rerun
+            edited = student_data.copy()
+            for position in rng.integers(len(edited), size=3) if len(edited) else []:
+                edited.loc[edited.index[position], columns] = scores
+                edited.loc[edited.index[position], 'Total'] = np.nansum(scores)
+            student_data = edited.iloc[:len(edited) - int(rng.integers(0, 3))].reset_index(drop=True)
+            state.sync(student_data)
+            rows = list(range(len(student_data)))
+        problems += [f"step {step} ({operation}): {problem}" for problem in compare(state, student_data,
+                                                                                  question_data, schema)]
+    return problems
+
+
+# Function to time one edited row: a full recompute against a sync of the running
+# state, then the mean of `repeat` adds, updates and deletes (in ms; adds include the
+# occasional doubling of the row buffer)
+def time_single_edit(rows, questions, seed, repeat=1000):
+    student_data = make_marks_table(rows=rows, questions=questions, seed=seed)
+    student_data['Total'] = student_data.filter(like="Q.").sum(axis=1)
+    state = IncrementalAttainment(columns=list(CourseSchema.from_course(None, student_data.columns).questions))
+    state.sync(student_data)
+    edited = student_data.copy()
+    edited.loc[rows // 2, 'Q.1'] = -1.0 if edited.loc[rows // 2, 'Q.1'] != -1.0 else 0.0
+    scores = [5.0] * questions
+
+    timings = {}
+    for name, operation, count in [("calculate_totals", lambda i: calculate_totals(edited), 1),
+                                   ("sync", lambda i: state.sync(edited), 1),
+                                   ("add", lambda i: state.add(scores), repeat),
+                                   ("update", lambda i: state.update(i, scores), repeat),
+                                   ("delete", lambda i: state.delete(i), repeat)]:
+        start = time.perf_counter()
+        for i in range(count):
+            operation(i)
+        timings[name] = (time.perf_counter() - start) / count * 1000
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the incremental attainment state against a full recompute.")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--cos", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-rows", type=int, default=100_000, help="Class size for the single-edit timing")
+    args = parser.parse_args(argv)
+
+    problems = check_random_edits(args.rows, args.questions, args.cos, args.steps, args.seed)
+    print(f"{'FAIL' if problems else 'ok':<5} {args.steps} random adds, updates, deletes and syncs")
+    for problem in problems[:20]:
+        print(f"      {problem}")
+
+    timings = time_single_edit(args.time_rows, args.questions, args.seed)
+    print(f"one student in {args.time_rows}: " + ", ".join(f"{name} {ms:.2f} ms" for name, ms in timings.items()))
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from copo_compute import extract_question_data
+from question_tokenizer import tokenize_questions, iter_page_questions
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+# The original three-regex extract_question_data, kept as the reference output
+def reference_question_data(text):
+    question_pattern = re.compile(r"Q\.\d+")
+    marks_pattern = re.compile(r"\[(\d+(\.\d+)?)\]")
+    co_pattern = re.compile(r"CO\d+")
+
+    questions = re.split(question_pattern, text)[1:]  # Splitting text by 'Q.'
+    question_data = []
+
+    for index, question in enumerate(questions):
+        cos = co_pattern.findall(question)
+        marks = marks_pattern.findall(question)
+        question_data.append({
+            'question_number': index + 1,
+            'cos': cos,
+            'marks': sum(float(mark[0]) for mark in marks)
+        })
+
+    return question_data
+
+
+# Function to check one corpus paper; form feeds mark its page breaks.
+# Returns a list of mismatch descriptions (empty when the tokenizer agrees).
+def check_paper(path):
+    with open(path, encoding="utf-8") as f:
+        pages = f.read().split("\f")
+    text = "".join(pages)
+    expected = reference_question_data(text)
+
+    problems = []
+    if extract_question_data(text) != expected:
+        problems.append("extract_question_data differs from the reference")
+    if tokenize_questions(text) != expected:
+        problems.append("full text differs from the reference")
+    if list(iter_page_questions(pages)) != expected:
+        problems.append("page stream differs from the reference")
+
+    detailed = list(iter_page_questions(pages, parts=True))
+    if [{key: q[key] for key in ('question_number', 'cos', 'marks')} for q in detailed] != expected:
+        problems.append("parts=True changes the question totals")
+    for question in detailed:
+        if sum(part['marks'] for part in question['parts']) != question['marks']:
+            problems.append(f"Q.{question['question_number']}: sub-part marks do not add up")
+    return problems, detailed
+
+
+# Function to build the page texts of a question bank like benchmarks/synthetic.py writes:
+# two sub-parts per question, each with its marks and CO
+def make_bank_pages(questions, pages):
+    blocks = [f"Q.{q} (a) Explain the concept behind topic {q} with a suitable example. [{2 + q % 4}] CO{1 + q % 4}\n"
+              f"(b) Derive the relation and solve the numerical problem. [{2 + q % 3}] CO{1 + (q + 1) % 4}\n"
+              for q in range(1, questions + 1)]
+    per_page = -(-questions // pages)
+    return ["".join(blocks[i:i + per_page]) for i in range(0, questions, per_page)]
+
+
+# Function to time the reference parser and the tokenizer (best of `repeat` runs, in ms)
+def time_parsers(questions, pages, repeat=20):
+    page_texts = make_bank_pages(questions, pages)
+    text = "".join(page_texts)
+    parsers = {
+        "reference": lambda: reference_question_data(text),
+        "extract_question_data": lambda: extract_question_data(text),
+        "tokenizer": lambda: tokenize_questions(text),
+        "tokenizer, page stream": lambda: list(iter_page_questions(page_texts)),
+        "tokenizer, parts=True": lambda: tokenize_questions(text, parts=True),
+    }
+    timings = {}
+    for name, parse in parsers.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best * 1000
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the question tokenizer against the original parser.")
+    parser.add_argument("papers", nargs="*", help="Text papers to check (default: every file in the corpus)")
+    parser.add_argument("--show", action="store_true", help="Print the sub-part breakdown of every paper")
+    parser.add_argument("--time", type=int, metavar="QUESTIONS",
+                        help="Also time the reference parser and the tokenizer on a bank of QUESTIONS questions")
+    parser.add_argument("--pages", type=int, default=100, help="Pages of the timed bank (default 100)")
+    args = parser.parse_args(argv)
+
+    papers = args.papers or sorted(glob.glob(os.path.join(CORPUS_DIR, "*.txt")))
+    failed = 0
+    for path in papers:
+        problems, detailed = check_paper(path)
+        print(f"{'FAIL' if problems else 'ok':<5} {os.path.basename(path)} ({len(detailed)} questions)")
+        for problem in problems:
+            print(f"      {problem}")
+        if args.show:
+            for question in detailed:
+                print("      " + json.dumps(question))
+        failed += bool(problems)
+    if args.time:
+        for name, ms in time_parsers(args.time, args.pages).items():
+            print(f"{name:<24} {ms:7.1f} ms ({args.time} questions, {args.pages} pages)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import write_question_paper, write_marks_workbook, write_co_po_mapping
+from copo_compute import (
+    extract_text_from_pdf,
+    extract_question_data,
+    aggregate_marks_by_co,
+    read_student_workbook,
+    prepare_student_data,
+    calculate_totals,
+    generate_co_question_table,
+    generate_student_co_table,
+    generate_co_metrics_table,
+    load_co_po_mapping,
+    generate_co_po_metrics_table,
+    calculate_attainment,
+)
+from pdf_stream import stream_question_data
+
+SCENARIOS = {
+    "small": dict(questions=5, cos=4, pages=1, rows=60),
+    "medium": dict(questions=20, cos=6, pages=10, rows=2_000),
+    "large": dict(questions=50, cos=8, pages=100, rows=20_000),
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+# Function to list the pipeline stages in order; each takes the outputs of earlier stages
+def pipeline_stages(files):
+    return [
+        ("extract_text_from_pdf", lambda s: extract_text_from_pdf(files["pdf"])),
+        ("extract_question_data", lambda s: extract_question_data(s["extract_text_from_pdf"])),
+        ("stream_question_data", lambda s: list(stream_question_data(files["pdf"]))),
+        ("aggregate_marks_by_co", lambda s: aggregate_marks_by_co(s["extract_question_data"])),
+        ("read_student_workbook", lambda s: read_student_workbook(files["marks"])),
+        ("prepare_student_data", lambda s: prepare_student_data(s["read_student_workbook"].copy())),
+        ("calculate_totals", lambda s: calculate_totals(s["prepare_student_data"])),
+        ("generate_co_question_table", lambda s: generate_co_question_table(
+            s["aggregate_marks_by_co"], s["extract_question_data"])),
+        ("generate_student_co_table", lambda s: generate_student_co_table(
+            s["aggregate_marks_by_co"], s["extract_question_data"],
+            [s["calculate_totals"].get(f"Total Students Who Attempted Q.{i + 1}", 0)
+             for i in range(len(s["extract_question_data"]))])),
+        ("generate_co_metrics_table", lambda s: generate_co_metrics_table(
+            s["aggregate_marks_by_co"], s["generate_student_co_table"],
+            s["calculate_totals"]["Total Students Appeared"])),
+        ("load_co_po_mapping", lambda s: load_co_po_mapping(files["mapping"])),
+        ("generate_co_po_metrics_table", lambda s: generate_co_po_metrics_table(
+            s["load_co_po_mapping"], s["generate_co_metrics_table"])),
+        ("calculate_attainment", lambda s: calculate_attainment(
+            s["generate_co_po_metrics_table"], s["load_co_po_mapping"])),
+    ]
+
+
+# Function to time every stage of one scenario: best/median wall time and peak Python heap
+def run_scenario(name, params, repeats, workdir):
+    files = {
+        "pdf": write_question_paper(os.path.join(workdir, f"{name}.pdf"),
+                                    params["questions"], params["cos"], params["pages"]),
+        "marks": write_marks_workbook(os.path.join(workdir, f"{name}.xlsx"), params["rows"], params["questions"]),
+        "mapping": write_co_po_mapping(os.path.join(workdir, f"{name}.mapping.csv"), params["cos"]),
+    }
+
+    outputs = {}
+    results = {}
+    for stage, run in pipeline_stages(files):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            outputs[stage] = run(outputs)
+            timings.append(time.perf_counter() - start)
+
+        # Separate run for memory, since tracing slows the timed runs down
+        tracemalloc.start()
+        run(outputs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[f"{name}/{stage}"] = {
+            "best_s": min(timings),
+            "median_s": statistics.median(timings),
+            "peak_kb": peak / 1024,
+        }
+    return results
+
+
+# Function to flag stages that got slower or hungrier than the baseline
+def compare(results, baseline, threshold, min_seconds=0.001, min_kb=64):
+    regressions = []
+    for key, current in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if (current["best_s"] > before["best_s"] * (1 + threshold)
+                and current["best_s"] - before["best_s"] > min_seconds):
+            regressions.append((key, "time", before["best_s"], current["best_s"]))
+        if (current["peak_kb"] > before["peak_kb"] * (1 + threshold)
+                and current["peak_kb"] - before["peak_kb"] > min_kb):
+            regressions.append((key, "memory", before["peak_kb"], current["peak_kb"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each attainment pipeline stage on synthetic data.")
+    parser.add_argument("--scenarios", nargs="+", default=["small", "medium"], choices=sorted(SCENARIOS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown/growth before flagging")
+    parser.add_argument("--output", help="Also write these results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.scenarios:
+            results.update(run_scenario(name, SCENARIOS[name], args.repeats, workdir))
+
+    print(f"{'stage':<45} {'best ms':>9} {'median ms':>10} {'peak KiB':>10}")
+    for key, r in results.items():
+        print(f"{key:<45} {r['best_s'] * 1000:>9.2f} {r['median_s'] * 1000:>10.2f} {r['peak_kb']:>10.0f}")
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --save-baseline first.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for key, kind, before, after in regressions:
+        unit = "ms" if kind == "time" else "KiB"
+        scale = 1000 if kind == "time" else 1
+        print(f"REGRESSION {key} {kind}: {before * scale:.2f} -> {after * scale:.2f} {unit}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
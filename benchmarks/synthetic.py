@@ -0,0 +1,130 @@
+import argparse
+import os
+
+import fitz  # PyMuPDF for reading PDFs
+import numpy as np
+import pandas as pd
+
+PAGE_RECT = fitz.Rect(36, 36, 576, 806)
+
+
+# Function to write a question paper with `questions` questions tagged with `cos` COs over `pages` pages.
+# Every question has two sub-parts with their own [marks] and CO tags, like the papers the app parses.
+def write_question_paper(path, questions=5, cos=4, pages=1, seed=0):
+    rng = np.random.default_rng(seed)
+    blocks = []
+    for q in range(1, questions + 1):
+        first_co, second_co = rng.integers(1, cos + 1, size=2)
+        blocks.append(
+            f"Q.{q} (a) Explain the concept behind topic {q} with a suitable example. "
+            f"[{int(rng.choice([2, 3, 4, 5]))}] CO{first_co}\n"
+            f"(b) Derive the relation and solve the numerical problem. [{int(rng.choice([2, 3, 5]))}] CO{second_co}"
+        )
+
+    doc = fitz.open()
+    per_page = -(-len(blocks) // max(pages, 1)) if blocks else 0
+    for page_num in range(max(pages, 1)):
+        page_blocks = blocks[page_num * per_page:(page_num + 1) * per_page] if per_page else []
+        header = "Mid Semester Examination\nAnswer all questions.\n" if page_num == 0 else ""
+        page = doc.new_page()
+        page.insert_textbox(PAGE_RECT, header + "\n".join(page_blocks), fontsize=8)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+# Function to write a tabular question paper: Q.No. | Question | CO | Marks columns, one row per
+# sub-part with its own CO and marks cells (marks without brackets), the header repeated on every page
+def write_tabular_question_paper(path, questions=5, cos=4, pages=1, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for q in range(1, questions + 1):
+        for label in ("a", "b"):
+            rows.append((str(q) if label == "a" else "",
+                         f"({label}) Explain part {label} of topic {q} with a suitable example.",
+                         f"CO{int(rng.integers(1, cos + 1))}", str(int(rng.choice([2, 3, 4, 5])))))
+            rows.append(("", "Support the answer with a neat diagram.", "", ""))
+
+    doc = fitz.open()
+    per_page = -(-len(rows) // max(pages, 1)) if rows else 0
+    for page_num in range(max(pages, 1)):
+        page = doc.new_page()
+        y = PAGE_RECT.y0 + 10
+        if page_num == 0:
+            page.insert_text((PAGE_RECT.x0, y), "Mid Semester Examination", fontsize=10)
+            y += 20
+        for cells in [("Q.No.", "Question", "CO", "Marks")] + rows[page_num * per_page:(page_num + 1) * per_page]:
+            for x, cell in zip((PAGE_RECT.x0, PAGE_RECT.x0 + 40, 470, 520), cells):
+                if cell:
+                    page.insert_text((x, y), cell, fontsize=8)
+            y += 11
+    doc.save(path)
+    doc.close()
+    return path
+
+
+# Function to build a marks table with `rows` students, ~8% blank and ~10% zero marks
+def make_marks_table(rows=60, questions=5, max_marks=10, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Enrollment_No": [f"EN{i:06d}" for i in range(rows)],
+        "FirstName": rng.choice(["Asha", "Ravi", "Meera", "Kiran", "Arjun", "Divya", "Neha", "Rahul"], size=rows),
+    })
+    for q in range(1, questions + 1):
+        scores = rng.integers(1, max_marks + 1, size=rows).astype(float)
+        scores[rng.random(rows) < 0.10] = 0
+        scores[rng.random(rows) < 0.08] = np.nan
+        df[f"Q.{q}"] = scores
+    return df
+
+
+# Function to write a marks workbook (title row then header, like the uploaded sheets) or a CSV/Parquet export
+def write_marks_workbook(path, rows=60, questions=5, seed=0):
+    df = make_marks_table(rows, questions, seed=seed)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        df.to_csv(path, index=False)
+    elif ext == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame([["Student Marks"]]).to_excel(writer, index=False, header=False)
+            df.to_excel(writer, index=False, startrow=1)
+    return path
+
+
+# Function to write a CO-PO mapping CSV with values 1-3 and ~40% empty cells
+def write_co_po_mapping(path, cos=4, pos=12, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.choice([1.0, 2.0, 3.0], size=(cos, pos))
+    values[rng.random(values.shape) < 0.4] = np.nan
+    pd.DataFrame(values, index=[f"CO{i}" for i in range(1, cos + 1)],
+                 columns=[f"PO{i}" for i in range(1, pos + 1)]).to_csv(path)
+    return path
+
+
+# Function to write `courses` complete courses into a directory the batch runner understands
+def write_course_set(directory, courses=10, questions=5, cos=4, pages=1, rows=60):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(courses):
+        stem = os.path.join(directory, f"COURSE{i:04d}")
+        write_question_paper(stem + ".pdf", questions, cos, pages, seed=i)
+        write_marks_workbook(stem + ".xlsx", rows, questions, seed=i)
+        write_co_po_mapping(stem + ".mapping.csv", cos, seed=i)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic question papers and marks workbooks.")
+    parser.add_argument("directory")
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--cos", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=60)
+    args = parser.parse_args()
+    write_course_set(args.directory, args.courses, args.questions, args.cos, args.pages, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import functools
+import io
+import os
+
+import numpy as np
+
+# Formats charts can be exported in, with their MIME types
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+# Rendered charts kept per process, keyed by the charted values and the format
+CHART_CACHE_SIZE = 256
+
+
+# Charts are drawn on bare Figure objects rather than through pyplot: nothing is
+# registered with a GUI backend or pyplot's figure list, so a figure is freed as soon
+# as its bytes are written, and rendering works headless in batch workers.
+def _render(draw, fmt, figsize=(6.4, 4.8)):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw(fig)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=100, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+# Function to turn a table of values into a hashable cache key (NaN-safe, unlike floats in a tuple)
+def _values_key(values):
+    values = np.ascontiguousarray(values, dtype=float)
+    return values.shape, values.tobytes()
+
+
+def _values_from_key(key):
+    shape, data = key
+    return np.frombuffer(data, dtype=float).reshape(shape)
+
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def _co_marks_pie(items, fmt):
+    def draw(fig):
+        ax = fig.subplots()
+        ax.pie([marks for _, marks in items], labels=[co for co, _ in items], autopct='%1.1f%%', startangle=140)
+        ax.axis('equal')  # Equal aspect ratio ensures that pie chart is circular
+    return _render(draw, fmt)
+
+
+# Function to render the share of marks asked per CO as a pie chart, returning image bytes
+def co_marks_pie(co_marks, fmt="png"):
+    return _co_marks_pie(tuple((co, float(marks)) for co, marks in co_marks.items()), fmt)
+
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def _co_attainment_bar(cos, values_key, fmt):
+    attainment = _values_from_key(values_key) * 100
+
+    def draw(fig):
+        ax = fig.subplots()
+        bars = ax.bar(cos, np.nan_to_num(attainment), color="tab:blue")
+        ax.bar_label(bars, labels=["" if np.isnan(v) else f"{v:.1f}%" for v in attainment])
+        ax.set_ylim(0, 100)
+        ax.set_ylabel("Attainment (%)")
+        ax.set_title("CO Attainment")
+    return _render(draw, fmt)
+
+
+# Function to render the attainment of every CO (Metric 2 of the CO metrics table) as a bar chart
+def co_attainment_bar(co_metrics_df, fmt="png"):
+    return _co_attainment_bar(tuple(co_metrics_df['CO']), _values_key(co_metrics_df['Metric 2']), fmt)
+
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+def _po_heatmap(cos, pos, values_key, fmt):
+    values = _values_from_key(values_key)
+
+    def draw(fig):
+        ax = fig.subplots()
+        image = ax.imshow(np.ma.masked_invalid(values), cmap="YlGn", aspect="auto")
+        fig.colorbar(image, ax=ax)
+        ax.set_xticks(range(len(pos)), labels=pos)
+        ax.set_yticks(range(len(cos)), labels=cos)
+        for (row, col), value in np.ndenumerate(values):
+            if not np.isnan(value):
+                ax.text(col, row, f"{value:.2f}", ha="center", va="center", fontsize=7)
+        ax.set_title("CO-PO Metrics")
+    return _render(draw, fmt, figsize=(9, 3.6))
+
+
+# Function to render the CO-PO metrics table (without its Average row and column) as a heat-map
+def po_heatmap(co_po_metrics_df, fmt="png"):
+    values = co_po_metrics_df.drop(index='Average', columns='Average', errors='ignore')
+    return _po_heatmap(tuple(map(str, values.index)), tuple(map(str, values.columns)),
+                       _values_key(values.to_numpy(dtype=float)), fmt)
+
+
+# Function to render every chart available for one course, as {chart name: image bytes}
+def course_charts(co_marks, co_metrics_df=None, co_po_metrics_df=None, fmt="png"):
+    charts = {}
+    if co_marks:
+        charts["co_marks"] = co_marks_pie(co_marks, fmt)
+    if co_metrics_df is not None:
+        charts["co_attainment"] = co_attainment_bar(co_metrics_df, fmt)
+    if co_po_metrics_df is not None:
+        charts["po_heatmap"] = po_heatmap(co_po_metrics_df, fmt)
+    return charts
+
+
+# Function to write a course's charts as <directory>/<course_id>_<chart>.<fmt>, returning the paths
+def write_course_charts(directory, course_id, charts, fmt="png"):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, data in charts.items():
+        path = os.path.join(directory, f"{course_id}_{name}.{fmt}")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
@@ -0,0 +1,265 @@
+# Computation functions of the CO-PO calculator, usable without Streamlit or matplotlib.
+# numpy, pandas and PyMuPDF are imported inside the functions that need them, so
+# importing this module (e.g. to parse question text) stays cheap for scripts and cron jobs.
+import re
+from collections import defaultdict
+
+from course_schema import CourseSchema, ID_COLUMNS, question_columns
+from question_tokenizer import tokenize_questions
+
+# The original fixed layout (CO1-CO4, Q.1-Q.5, PO1-PO12).  The tables follow the
+# CourseSchema of each course; these remain as the defaults of a course without one.
+DEFAULT_SCHEMA = CourseSchema()
+CO_ORDER = list(DEFAULT_SCHEMA.cos)
+PO_ORDER = list(DEFAULT_SCHEMA.pos)
+REQUIRED_STUDENT_COLUMNS = DEFAULT_SCHEMA.student_columns
+
+# Question markers, [marks] and CO tags of a paper's full text.  Each has a literal
+# prefix, so the three scans beat a single alternation (question_tokenizer) on full text.
+QUESTION_PATTERN = re.compile(r"Q\.\d+")
+MARKS_PATTERN = re.compile(r"\[(\d+(?:\.\d+)?)\]")
+CO_PATTERN = re.compile(r"CO\d+")
+
+
+# Function to extract text from PDF using PyMuPDF
+def extract_text_from_pdf(pdf_file):
+    from pdf_stream import open_pdf, iter_page_texts
+
+    return "".join(iter_page_texts(open_pdf(pdf_file)))
+
+
+# Function to extract questions, marks, and COs from a paper's full text.  parts=True adds
+# each question's sub-parts, read by the tokenizer.
+def extract_question_data(text, parts=False):
+    if parts:
+        return tokenize_questions(text, parts=True)
+
+    questions = QUESTION_PATTERN.split(text)[1:]  # Splitting text by 'Q.'
+    return [{
+        'question_number': index + 1,
+        'cos': CO_PATTERN.findall(question),
+        'marks': sum(float(mark) for mark in MARKS_PATTERN.findall(question)),
+    } for index, question in enumerate(questions)]
+
+
+# Function to aggregate marks by CO
+def aggregate_marks_by_co(question_data):
+    co_marks = defaultdict(float)
+
+    for qdata in question_data:
+        cos = qdata['cos']
+        marks = qdata['marks']
+        for co in cos:
+            co_marks[co] += marks
+
+    return co_marks
+
+
+# Function to read a marks workbook (or CSV/Parquet export) without any Streamlit output
+def read_student_workbook(excel_file, file_name=None):
+    from marks_ingest import load_marks
+
+    # Only Enrollment_No, FirstName and the Q.n/Total columns are read, with compact dtypes
+    return load_marks(excel_file, file_name=file_name)
+
+
+# Function to validate student data and add the derived columns.  With a schema every
+# question of the course needs a column; without one, any Q.n columns are accepted.
+def prepare_student_data(df, schema=None):
+    questions = list(schema.questions) if schema is not None else question_columns(df.columns)
+    required = ID_COLUMNS + (questions or ["Q.1"])
+
+    # Check if required columns are present in the DataFrame
+    if not all(col in df.columns for col in required):
+        raise ValueError(f"Excel file must contain the following columns: {', '.join(required)}")
+
+    # Calculate total marks for each student if not present in the uploaded data
+    if 'Total' not in df.columns:
+        df['Total'] = df[questions].sum(axis=1)
+
+    # Ensure 'S. No.' column is created
+    df['S. No.'] = df.index + 1  # Adding serial number
+
+    return df
+
+
+# Function to calculate total number of students and marks
+def calculate_totals(student_data):
+    import numpy as np
+    from attainment_core import score_matrix, appeared_mask, attempt_counts
+
+    columns = question_columns(student_data.columns)
+    scores = score_matrix(student_data, columns)
+
+    # Consider students as appeared if they have marks >= 0 in any question column
+    appeared = appeared_mask(scores)
+
+    # Count students who attempted each question (marks > 0)
+    attempts = attempt_counts(scores)
+
+    # Calculate the total of "Total" marks, filling NaN with 0 if needed
+    total_marks = np.nansum(student_data['Total'].to_numpy(dtype=float, na_value=np.nan)[appeared])
+
+    totals = {"Total Students Appeared": int(appeared.sum())}
+    for column, attempted in zip(columns, attempts):
+        totals[f"Total Students Who Attempted {column}"] = int(attempted)
+    totals["Overall Total Marks"] = float(total_marks)
+    return totals
+
+
+# Function to append the class totals to the student table as a row of its own: the
+# number of students appeared in the name column, the attempts per question and the
+# overall total.  The students' rows are left as they are.
+def student_totals_row(student_data, totals):
+    import pandas as pd
+
+    row = {'FirstName': f"(Total No. of Students = {totals['Total Students Appeared']})"}
+    for column in question_columns(student_data.columns):
+        row[column] = totals[f"Total Students Who Attempted {column}"]
+    row['Total'] = totals['Overall Total Marks']
+    # Names may be categorical; the totals label is not one of their categories
+    student_data = student_data.astype({'FirstName': object})
+    return pd.concat([student_data, pd.DataFrame([row])], ignore_index=True)
+
+
+# Function to turn a COs x questions matrix into a table with one row per CO
+def build_co_table(values, co_order):
+    import pandas as pd
+
+    co_df = pd.DataFrame(values, columns=[f"Q.{i+1}" for i in range(values.shape[1])])
+    co_df.insert(0, 'CO', co_order)
+    return co_df
+
+
+# Function to generate the CO vs. Questions table (one row per CO of the schema, which
+# defaults to the one derived from the paper)
+def generate_co_question_table(co_marks, question_data, schema=None):
+    schema = schema or CourseSchema.from_course(question_data)
+    marks, incidence = schema.question_vectors(question_data)
+
+    # Assign the full marks of a question to each of its COs, without splitting
+    return build_co_table((incidence > 0).T * marks, list(schema.cos))
+
+
+#function to generate MARKS * APPEARED table
+def generate_student_co_table(co_marks, question_data, students_attempted, schema=None):
+    import numpy as np
+
+    schema = schema or CourseSchema.from_course(question_data)
+    marks, incidence = schema.question_vectors(question_data)
+
+    # Number of students who attempted each question (0 for questions without a count)
+    attempts = np.zeros(len(marks))
+    count = min(len(marks), len(students_attempted))
+    attempts[:count] = students_attempted[:count]
+
+    # Multiply the marks of each question with the number of students, assigned to each CO
+    return build_co_table((incidence > 0).T * (marks * attempts), list(schema.cos))
+
+
+# Function to generate the CO metrics table (for the COs of the schema, or else of the student CO table)
+def generate_co_metrics_table(co_marks, student_co_df, total_students, schema=None):
+    import numpy as np
+    import pandas as pd
+    from attainment_core import co_metrics
+
+    cos = list(schema.cos) if schema is not None else list(student_co_df['CO'])
+
+    # Sum of (marks * number of students appeared) for each CO
+    weighted = (student_co_df.set_index('CO').reindex(cos, fill_value=0)
+                .select_dtypes(include=['float64', 'int64']).sum(axis=1).to_numpy())
+
+    # Sum of total marks asked in each CO; COs missing from co_marks are filled with zeros
+    present = np.array([co in co_marks for co in cos])
+    marks_asked = np.array([co_marks.get(co, 0) for co in cos], dtype=float)
+    weighted = np.where(present, weighted, 0)
+    co_average, co_normalized = co_metrics(weighted, marks_asked, total_students)
+
+    return pd.DataFrame({
+        'CO': cos,
+        'Sum of (Marks * No. of Students)': weighted,
+        'Metric 1': co_average,
+        'Metric 2': co_normalized
+    })
+
+
+# Function to add the PO/CO average row and column to a CO-PO mapping
+def add_co_po_averages(co_po_df):
+    # Calculate the average for each PO (only if all COs have a value)
+    po_averages = co_po_df.mean(axis=0, skipna=True)
+    po_averages = po_averages.where(co_po_df.notna().all(axis=0))
+
+    # Calculate the average for each CO (only for present values)
+    co_averages = co_po_df.mean(axis=1, skipna=True)
+
+    # Add averages to the DataFrame
+    co_po_df.loc['Average'] = po_averages
+    co_po_df['Average'] = co_averages
+
+    # Calculate the average of CO averages and set it in the last row of the Average column
+    average_of_co_averages = co_averages.mean() if not co_averages.isna().all() else float("nan")
+    co_po_df.at['Average', 'Average'] = average_of_co_averages
+
+    return co_po_df
+
+
+# Function to load a CO-PO mapping (COs as rows, POs as columns) from a CSV or Excel file
+def load_co_po_mapping(mapping_file):
+    import pandas as pd
+
+    name = str(getattr(mapping_file, 'name', mapping_file)).lower()
+    if name.endswith('.csv'):
+        co_po_df = pd.read_csv(mapping_file, index_col=0)
+    else:
+        co_po_df = pd.read_excel(mapping_file, index_col=0)
+
+    # Drop any averages carried over from an exported mapping and force numeric cells
+    co_po_df = co_po_df.drop(index='Average', columns='Average', errors='ignore')
+    co_po_df = co_po_df.apply(pd.to_numeric, errors='coerce')
+    co_po_df.index = co_po_df.index.astype(str).str.strip()
+    co_po_df.columns = co_po_df.columns.astype(str).str.strip()
+
+    return add_co_po_averages(co_po_df)
+
+
+def generate_co_po_metrics_table(co_po_mapping, co_metrics_df):
+    import numpy as np
+    import pandas as pd
+    from attainment_core import co_po_metrics_matrix, co_po_averages
+
+    if co_po_mapping is None:
+        raise ValueError("co_po_mapping cannot be None")
+    # Work on the plain CO x PO matrix; the averages are recomputed below
+    mapping = co_po_mapping.drop(index='Average', columns='Average', errors='ignore').astype(float)
+
+    # Metric 2 of each mapped CO (NaN for COs without metrics)
+    metric_2 = co_metrics_df.set_index('CO')['Metric 2'].reindex(mapping.index).to_numpy(dtype=float)
+
+    # Multiply every mapping value with the Metric 2 of its CO in one step
+    values = co_po_metrics_matrix(mapping.to_numpy(), metric_2)
+    po_averages, co_averages, average_of_co_averages = co_po_averages(values)
+
+    # Add averages to the results DataFrame
+    co_po_results = pd.DataFrame(values, index=mapping.index, columns=mapping.columns)
+    co_po_results.loc['Average'] = po_averages
+    co_po_results['Average'] = np.append(co_averages, average_of_co_averages)
+
+    return co_po_results
+
+
+def average_of_co_averages(df):
+    if 'Average' in df.columns:
+        return df['Average'].mean() if not df['Average'].isna().all() else float("nan")
+    return float("nan")
+
+
+def calculate_attainment(co_po_metrics_df, co_po_mapping_df):
+    avg_metrics = average_of_co_averages(co_po_metrics_df)
+    avg_mapping = average_of_co_averages(co_po_mapping_df)
+
+    if avg_mapping > 0:  # Prevent division by zero
+        attainment = (avg_metrics / avg_mapping) * 100
+    else:
+        attainment = 0
+
+    return attainment
@@ -0,0 +1,99 @@
+import re
+
+# Matches marks columns such as "Q.1" ... "Q.20"
+QUESTION_COLUMN_PATTERN = re.compile(r"^Q\.(\d+)$")
+
+# Matches course and program outcome labels such as "CO3" and "PO12"
+CO_PATTERN = re.compile(r"^CO(\d+)$")
+PO_PATTERN = re.compile(r"^PO(\d+)$")
+
+# The original fixed layout (CO1-CO4, Q.1-Q.5, PO1-PO12).  A schema never has fewer
+# COs or POs than this, so the tables of existing courses keep their shape.
+DEFAULT_CO_COUNT = 4
+DEFAULT_QUESTION_COUNT = 5
+DEFAULT_PO_COUNT = 12
+
+# Columns identifying a student in every marks table
+ID_COLUMNS = ["Enrollment_No", "FirstName"]
+
+
+# Function to list the question columns of a marks table in question order
+def question_columns(columns):
+    numbered = []
+    for column in columns:
+        match = QUESTION_COLUMN_PATTERN.match(str(column))
+        if match:
+            numbered.append((int(match.group(1)), column))
+    return [column for _, column in sorted(numbered)]
+
+
+def _highest(labels, pattern):
+    numbers = [int(match.group(1)) for match in map(pattern.match, map(str, labels)) if match]
+    return max(numbers, default=0)
+
+
+# The COs, questions and POs of one course, shared by every stage of the pipeline.
+# Labels are numbered contiguously (CO1..COn, Q.1..Q.n, PO1..POn).  COs and questions
+# also have a compact integer index, their position in the matching tuple, which places
+# them in the questions x COs matrices of a paper (see question_vectors).
+class CourseSchema:
+    def __init__(self, co_count=DEFAULT_CO_COUNT, question_count=DEFAULT_QUESTION_COUNT, po_count=DEFAULT_PO_COUNT):
+        self.cos = tuple(f"CO{i}" for i in range(1, co_count + 1))
+        self.questions = tuple(f"Q.{i}" for i in range(1, question_count + 1))
+        self.pos = tuple(f"PO{i}" for i in range(1, po_count + 1))
+        self.co_index = {co: i for i, co in enumerate(self.cos)}
+        self.question_index = {question: i for i, question in enumerate(self.questions)}
+
+    # Function to derive the schema of a course from its parsed paper, the columns of
+    # its marks table and its CO-PO mapping (any of which may be missing).  Questions
+    # run up to the last one on the paper or in the marks table; without either the
+    # original five questions are assumed (e.g. for the manual entry grid).
+    @classmethod
+    def from_course(cls, question_data=None, student_columns=None, co_po_mapping=None):
+        question_data = question_data or []
+        student_columns = [] if student_columns is None else student_columns
+        co_count = _highest((co for q in question_data for co in q['cos']), CO_PATTERN)
+        question_count = max(len(question_data), _highest(student_columns, QUESTION_COLUMN_PATTERN))
+        po_count = 0
+        if co_po_mapping is not None:
+            co_count = max(co_count, _highest(co_po_mapping.index, CO_PATTERN))
+            po_count = _highest(co_po_mapping.columns, PO_PATTERN)
+        return cls(max(co_count, DEFAULT_CO_COUNT), question_count or DEFAULT_QUESTION_COUNT,
+                   max(po_count, DEFAULT_PO_COUNT))
+
+    @property
+    def co_count(self):
+        return len(self.cos)
+
+    @property
+    def question_count(self):
+        return len(self.questions)
+
+    @property
+    def po_count(self):
+        return len(self.pos)
+
+    # Columns a marks table must provide for this course
+    @property
+    def student_columns(self):
+        return ID_COLUMNS + list(self.questions)
+
+    # Function to build the marks vector and questions x COs incidence matrix of a paper
+    def question_vectors(self, question_data):
+        from attainment_core import question_vectors
+
+        return question_vectors(question_data, self.co_index, self.question_index)
+
+    # Function to list the number of students who attempted each question, in question order
+    def students_attempted(self, totals):
+        return [totals.get(f"Total Students Who Attempted {question}", 0) for question in self.questions]
+
+    def __eq__(self, other):
+        return isinstance(other, CourseSchema) and (self.cos, self.questions, self.pos) == (
+            other.cos, other.questions, other.pos)
+
+    def __hash__(self):
+        return hash((self.cos, self.questions, self.pos))
+
+    def __repr__(self):
+        return f"CourseSchema(co_count={self.co_count}, question_count={self.question_count}, po_count={self.po_count})"
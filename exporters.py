@@ -0,0 +1,176 @@
+import io
+import os
+import zipfile
+
+# Sheet names (Excel allows at most 31 characters) and their tables, in workbook order
+SHEET_TITLES = {
+    "student_data": "Student Data",
+    "co_question": "CO vs Questions",
+    "student_co": "Student CO Marks",
+    "co_metrics": "CO Metrics",
+    "co_po_mapping": "CO-PO Mapping",
+    "co_po_metrics": "CO-PO Metrics",
+    "attainment": "Attainment",
+}
+
+# Tables whose index holds the CO labels (the others carry their labels in a column)
+INDEXED_TABLES = ("co_po_mapping", "co_po_metrics")
+
+REPORT_CSS = """
+body {font-family: sans-serif; font-size: 9px;}
+h1 {font-size: 16px;} h2 {font-size: 12px; margin-top: 12px;}
+table {border-collapse: collapse;}
+td, th {border: 1px solid #999; padding: 2px 4px; text-align: right;}
+"""
+
+
+# Function to collect the result tables of one course as {table key: DataFrame}; tables
+# that were not computed (e.g. no CO-PO mapping submitted) are left out
+def course_tables(student_data=None, co_question_df=None, student_co_df=None, co_metrics_df=None,
+                  co_po_mapping=None, co_po_metrics_df=None, attainment=None):
+    import pandas as pd
+
+    tables = {
+        "student_data": student_data,
+        "co_question": co_question_df,
+        "student_co": student_co_df,
+        "co_metrics": co_metrics_df,
+        "co_po_mapping": co_po_mapping,
+        "co_po_metrics": co_po_metrics_df,
+    }
+    if attainment is not None:
+        tables["attainment"] = pd.DataFrame({"Attainment (%)": [float(attainment)]})
+    return {key: df for key, df in tables.items() if df is not None}
+
+
+# Function to convert one column for the sheet in a single vectorized pass: returns the
+# cells as plain Python values (None for blanks, since xlsxwriter rejects NaN/inf) and
+# whether they are numbers or strings
+def _column_cells(values):
+    import numpy as np
+    import pandas as pd
+
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        cells = numbers.astype(object)
+        cells[~np.isfinite(numbers)] = None
+        return cells.tolist(), True
+    blank = values.isna().to_numpy()
+    cells = values.astype(str).to_numpy(dtype=object)
+    cells[blank] = None
+    return cells.tolist(), False
+
+
+# Function to write the tables to one workbook, a sheet per table, row by row with
+# xlsxwriter's constant-memory mode: finished rows go straight to a temporary file, so
+# the workbook is never built up in memory.  `target` is a path or a binary file object.
+def write_results_workbook(target, tables):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True})
+    try:
+        for key, df in tables.items():
+            sheet = workbook.add_worksheet(SHEET_TITLES.get(key, key)[:31])
+            index = key in INDEXED_TABLES
+            header = ([df.index.name or "CO"] if index else []) + [str(column) for column in df.columns]
+            sheet.write_row(0, 0, header, header_format)
+
+            columns = ([df.index] if index else []) + [df.iloc[:, i] for i in range(df.shape[1])]
+            cells, writers = [], []
+            for column in columns:
+                column_cells, numeric = _column_cells(column)
+                cells.append(column_cells)
+                writers.append(sheet.write_number if numeric else sheet.write_string)
+
+            # constant_memory flushes each row as soon as the next one starts
+            for row_num, row in enumerate(zip(*cells), start=1):
+                for col_num, (value, write) in enumerate(zip(row, writers)):
+                    if value is not None:
+                        write(row_num, col_num, value)
+    finally:
+        workbook.close()
+    return target
+
+
+# Function to return the results workbook of one course as bytes
+def results_workbook_bytes(tables):
+    buffer = io.BytesIO()
+    write_results_workbook(buffer, tables)
+    return buffer.getvalue()
+
+
+# Function to build a printable PDF report of one course: the summary tables and its
+# charts (given as PNG bytes by chart name), laid out over as many A4 pages as needed.
+# The per-student table is left out of the report; it is in the workbook.
+def course_report_pdf(title, tables, charts=None):
+    import fitz  # PyMuPDF for writing PDFs
+
+    archive = fitz.Archive()
+    parts = [f"<h1>{title}</h1>"]
+    for key, df in tables.items():
+        if key == "student_data":
+            continue
+        parts.append(f"<h2>{SHEET_TITLES.get(key, key)}</h2>")
+        parts.append(df.to_html(index=key in INDEXED_TABLES, float_format="%.2f", na_rep=""))
+    for name, png in (charts or {}).items():
+        archive.add(png, f"{name}.png")
+        parts.append(f'<p><img src="{name}.png" width="400"/></p>')
+
+    story = fitz.Story(html="".join(parts), user_css=REPORT_CSS, archive=archive)
+    buffer = io.BytesIO()
+    writer = fitz.DocumentWriter(buffer)
+    mediabox = fitz.paper_rect("a4")
+    more = True
+    while more:
+        device = writer.begin_page(mediabox)
+        more, _ = story.place(mediabox + (36, 36, -36, -36))
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return buffer.getvalue()
+
+
+# Function to build the downloadable files of one course: {file name: bytes}
+def course_exports(course_id, tables, charts=None, report=True):
+    files = {f"{course_id}.xlsx": results_workbook_bytes(tables)}
+    if report:
+        files[f"{course_id}.pdf"] = course_report_pdf(course_id, tables, charts)
+    return files
+
+
+# Function to add one course's files to a zip archive under <course_id>/.  Courses are
+# added one at a time as they finish, so a batch never holds more than one course's files.
+def add_course_to_zip(zip_file, course_id, files):
+    for name, data in files.items():
+        zip_file.writestr(f"{course_id}/{name}", data)
+
+
+# Function to list the archive names of one course's files, as course_exports and
+# add_course_to_zip write them
+def course_zip_names(course_id, report=True):
+    names = [f"{course_id}/{course_id}.xlsx"]
+    if report:
+        names.append(f"{course_id}/{course_id}.pdf")
+    return names
+
+
+# Function to check that a report zip was closed: it then ends with its 22-byte
+# end-of-central-directory record (no archive comment is written).  zipfile.is_zipfile
+# is not enough, as a truncated archive may end inside a stored workbook, itself a zip.
+def _zip_is_closed(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < 22:
+            return False
+        f.seek(-22, os.SEEK_END)
+        return f.read(4) == b"PK\x05\x06"
+
+
+# Function to open the batch zip of reports; an existing archive from an interrupted
+# run is appended to, matching the batch runner's resume behaviour.  An archive left
+# unfinished by a killed run is started again (the batch runner re-runs its courses).
+def open_report_zip(path):
+    mode = "a" if not os.path.exists(path) or _zip_is_closed(path) else "w"
+    return zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED)
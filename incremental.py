@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from attainment_core import (score_matrix, appeared_mask, attempt_counts, question_totals, co_marks_vector,
+                             co_weighted_totals, co_metrics)
+from copo_compute import generate_co_po_metrics_table, calculate_attainment
+from course_schema import CourseSchema, question_columns
+
+
+# Function to mark the rows of two float arrays that are bit-for-bit identical, so two
+# blanks (NaN) compare equal.  A row flagged as different only costs an extra delta.
+def _same_rows(a, b):
+    same = a.view(np.int64) == b.view(np.int64)
+    return same.all(axis=1) if same.ndim == 2 else same
+
+
+# Running attainment state for live mark entry.  It keeps the score matrix and the
+# per-question sums (students appeared, attempts, marks scored, total marks); adding,
+# updating or deleting a student only applies that row's contribution in O(questions),
+# and the CO metrics are derived from the sums in O(questions x COs) without touching
+# the rest of the class.
+#
+# Students are identified by row ids, not by enrollment number, so blank or repeated
+# numbers are counted like any other row.  Rows live in a buffer that doubles when full;
+# deleting a row only marks it, so the ids of the other rows stay valid.  sync()
+# renumbers the rows to the positions of the table it is given.
+class IncrementalAttainment:
+    def __init__(self, question_data=None, schema=None, columns=None):
+        self.schema = schema or CourseSchema.from_course(question_data)
+        self.co_order = list(self.schema.cos)
+        # Marks columns tracked (defaults to the questions of the schema)
+        self.question_columns = list(columns) if columns is not None else list(self.schema.questions)
+        self.marks, self.incidence = self.schema.question_vectors(question_data or [])
+        self.co_marks = co_marks_vector(self.marks, self.incidence)
+
+        width = len(self.question_columns)
+        self._scores = np.empty((0, width))  # One row per row id, of which the first _size are used
+        self._totals = np.empty(0)  # NaN where the Total cell is blank
+        self._live = np.empty(0, dtype=bool)  # False for deleted rows
+        self._size = 0
+        self.appeared = 0
+        self.attempts = np.zeros(width, dtype=np.int64)
+        self.question_totals = np.zeros(width)  # Marks scored per question by the students who appeared
+        self.total_marks = 0.0
+
+    # Function to build the state from a whole marks table
+    @classmethod
+    def from_student_data(cls, question_data, student_data, schema=None):
+        state = cls(question_data, schema)
+        state.sync(student_data)
+        return state
+
+    # Score matrix of the current students, in row order (a copy)
+    @property
+    def scores(self):
+        return self._scores[:self._size][self._live[:self._size]]
+
+    # Function to turn {"Q.1": 4, ...} (or a sequence in question order) into a score vector
+    def _score_vector(self, scores):
+        if isinstance(scores, dict):
+            values = [scores.get(column) for column in self.question_columns]
+        else:
+            values = list(scores) + [None] * (len(self.question_columns) - len(scores))
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    # Function to turn a total into a float; it defaults to the sum of the question marks
+    @staticmethod
+    def _total(scores, total):
+        if total is None:
+            return float(np.nansum(scores))
+        return np.nan if pd.isna(total) else float(total)  # NaN counts as 0, like calculate_totals
+
+    # Function to add (sign=1) or remove (sign=-1) the contribution of some rows
+    def _apply(self, scores, totals, sign):
+        appeared = appeared_mask(scores)
+        self.appeared += sign * int(appeared.sum())
+        self.total_marks += sign * float(np.nansum(totals[appeared]))
+        self.attempts += sign * attempt_counts(scores)
+        self.question_totals += sign * question_totals(scores, appeared)
+
+    # Function to return the id of a current row, rejecting deleted or unknown ids
+    def _row(self, row):
+        if not 0 <= row < self._size or not self._live[row]:
+            raise KeyError(f"No student in row {row}")
+        return row
+
+    # Add one student's marks, returning the new row's id.  The buffer doubles when full,
+    # so adding costs O(questions) on average.
+    def add(self, scores, total=None):
+        scores = self._score_vector(scores)
+        total = self._total(scores, total)
+        if self._size == len(self._totals):
+            capacity = max(2 * len(self._totals), 16)
+            self._scores = np.resize(self._scores, (capacity, len(self.question_columns)))
+            self._totals = np.resize(self._totals, capacity)
+            self._live = np.resize(self._live, capacity)
+        row = self._size
+        self._scores[row] = scores
+        self._totals[row] = total
+        self._live[row] = True
+        self._size += 1
+        self._apply(scores[None, :], np.array([total]), 1)
+        return row
+
+    # Replace the marks of the student in one row
+    def update(self, row, scores, total=None):
+        row = self._row(row)
+        scores = self._score_vector(scores)
+        total = self._total(scores, total)
+        self._apply(self._scores[row:row + 1], self._totals[row:row + 1], -1)
+        self._scores[row] = scores
+        self._totals[row] = total
+        self._apply(scores[None, :], np.array([total]), 1)
+
+    # Remove the student in one row; the row is only marked as deleted
+    def delete(self, row):
+        row = self._row(row)
+        self._apply(self._scores[row:row + 1], self._totals[row:row + 1], -1)
+        self._live[row] = False
+
+    # Function to bring the state up to date with a whole marks table, comparing it row by
+    # row with the current students: only changed, added and removed rows are applied.
+    # Afterwards the row ids are the table's row positions.  Returns the number of rows applied.
+    def sync(self, student_data):
+        present = [column for column in self.question_columns if column in student_data.columns]
+        if len(present) == len(self.question_columns):
+            scores = np.array(score_matrix(student_data, present))
+        else:
+            scores = np.full((len(student_data), len(self.question_columns)), np.nan)
+            scores[:, [self.question_columns.index(column) for column in present]] = score_matrix(student_data,
+                                                                                                present)
+        if 'Total' in student_data.columns:
+            totals = student_data['Total'].to_numpy(dtype=float, na_value=np.nan, copy=True)
+        else:
+            totals = np.nansum(scores, axis=1)
+
+        old_scores, old_totals = self._scores[:self._size], self._totals[:self._size]
+        live = self._live[:self._size]
+        if not live.all():
+            old_scores, old_totals = old_scores[live], old_totals[live]
+        common = min(len(scores), len(old_scores))
+        changed = np.flatnonzero(~(_same_rows(scores[:common], old_scores[:common])
+                                   & _same_rows(totals[:common], old_totals[:common])))
+
+        # Take out the old rows that changed or are gone, then add the new and changed rows
+        self._apply(old_scores[changed], old_totals[changed], -1)
+        self._apply(old_scores[common:], old_totals[common:], -1)
+        self._apply(scores[changed], totals[changed], 1)
+        self._apply(scores[common:], totals[common:], 1)
+        self._scores, self._totals = scores, totals
+        self._live = np.ones(len(scores), dtype=bool)
+        self._size = len(scores)
+        return len(changed) + abs(len(scores) - len(old_scores))
+
+    # Function to report the same summary as calculate_totals
+    def totals(self):
+        totals = {"Total Students Appeared": self.appeared}
+        for column, attempted in zip(self.question_columns, self.attempts):
+            totals[f"Total Students Who Attempted {column}"] = int(attempted)
+        totals["Overall Total Marks"] = float(self.total_marks)
+        return totals
+
+    # Function to build the same table as generate_co_metrics_table from the running sums
+    def co_metrics_table(self):
+        attempts = np.array(self.schema.students_attempted(self.totals()), dtype=float)
+        weighted = co_weighted_totals(self.marks, self.incidence, attempts)
+        metric_1, metric_2 = co_metrics(weighted, self.co_marks, self.appeared)
+        return pd.DataFrame({
+            'CO': self.co_order,
+            'Sum of (Marks * No. of Students)': weighted,
+            'Metric 1': metric_1,
+            'Metric 2': metric_2
+        })
+
+    # Function to compute the CO-PO metrics table for a mapping from the current state
+    def co_po_metrics_table(self, co_po_mapping):
+        return generate_co_po_metrics_table(co_po_mapping, self.co_metrics_table())
+
+    # Function to compute the attainment percentage for a mapping from the current state
+    def attainment(self, co_po_mapping):
+        return calculate_attainment(self.co_po_metrics_table(co_po_mapping), co_po_mapping)
+
+
+# Function to keep the running totals of a marks table up to date: `previous` is the state
+# from the last call (or None), updated in place when the table has the same question
+# columns and rebuilt otherwise.  Used by the app's pipeline, so editing one row of the
+# entry grid only applies that row.
+def sync_student_state(previous, student_data):
+    columns = question_columns(student_data.columns)
+    if previous is None or previous.question_columns != columns:
+        previous = IncrementalAttainment(columns=columns)
+    previous.sync(student_data)
+    return previous
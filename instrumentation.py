@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger("copocalculator.diagnostics")
+
+# Opt in with COPO_DIAGNOSTICS=1 (or the checkbox in the app's sidebar)
+DIAGNOSTICS_ENABLED = os.environ.get("COPO_DIAGNOSTICS", "").lower() in ("1", "true", "yes")
+
+# Optional Prometheus textfile-collector path, rewritten after every instrumented rerun
+METRICS_FILE = os.environ.get("COPO_METRICS_FILE")
+
+# Process-wide totals per stage, shared by all sessions, for the Prometheus export
+_totals = {}
+_totals_lock = threading.Lock()
+
+# tracemalloc is process-wide, so sessions share one trace; peaks are approximate
+# when stages of different sessions overlap
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+        return peak
+
+
+# Records wall time, peak Python heap and input sizes of each stage of one rerun.
+# A disabled recorder still yields a dict from stage() so call sites stay unconditional.
+class StageRecorder:
+    def __init__(self, enabled=DIAGNOSTICS_ENABLED, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, **sizes):
+        record = dict(sizes)
+        if not self.enabled:
+            yield record
+            return
+
+        if self.trace_memory:
+            base = _start_tracing()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = None
+            if self.trace_memory:
+                peak_bytes = max(_stop_tracing() - base, 0)
+            self.records.append({"stage": name, "seconds": seconds, "peak_bytes": peak_bytes, **record})
+
+    # Function to log every record as one JSON line and add it to the process-wide totals
+    def publish(self):
+        if not self.enabled:
+            return
+        with _totals_lock:
+            for record in self.records:
+                logger.info(json.dumps(record, default=str))
+                totals = _totals.setdefault(record["stage"], {"count": 0, "seconds": 0.0, "peak_bytes": 0})
+                totals["count"] += 1
+                totals["seconds"] += record["seconds"]
+                totals["peak_bytes"] = max(totals["peak_bytes"], record["peak_bytes"] or 0)
+        if METRICS_FILE:
+            write_prometheus_file(METRICS_FILE)
+
+    # Function to return this rerun's records as JSON lines
+    def to_json_lines(self):
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.records)
+
+
+# Function to render the process-wide stage totals in the Prometheus text format
+def prometheus_text():
+    lines = [
+        "# HELP copo_stage_seconds_total Wall time spent in each pipeline stage.",
+        "# TYPE copo_stage_seconds_total counter",
+    ]
+    with _totals_lock:
+        totals = {stage: dict(values) for stage, values in _totals.items()}
+    for stage, values in sorted(totals.items()):
+        lines.append(f'copo_stage_seconds_total{{stage="{stage}"}} {values["seconds"]:.6f}')
+    lines += [
+        "# HELP copo_stage_runs_total Number of times each pipeline stage ran.",
+        "# TYPE copo_stage_runs_total counter",
+    ]
+    for stage, values in sorted(totals.items()):
+        lines.append(f'copo_stage_runs_total{{stage="{stage}"}} {values["count"]}')
+    lines += [
+        "# HELP copo_stage_peak_memory_bytes Largest Python heap growth seen in each pipeline stage.",
+        "# TYPE copo_stage_peak_memory_bytes gauge",
+    ]
+    for stage, values in sorted(totals.items()):
+        lines.append(f'copo_stage_peak_memory_bytes{{stage="{stage}"}} {values["peak_bytes"]}')
+    return "\n".join(lines) + "\n"
+
+
+# Function to atomically write the Prometheus metrics for a textfile collector
+def write_prometheus_file(path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
@@ -0,0 +1,114 @@
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from parse_cache import content_hash
+
+DEFAULT_WORKERS = int(os.environ.get("COPO_JOB_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_MAX_PENDING = int(os.environ.get("COPO_JOB_QUEUE_SIZE", "64"))
+
+# Finished jobs kept for polling sessions; results also live in the parse cache
+MAX_FINISHED_JOBS = 256
+
+
+# Job function: question data of an uploaded question paper.  Job functions import
+# their parsers on first use, so importing the queue stays cheap for the app.
+def parse_question_paper(data, file_name=None, workers=1):
+    from pdf_stream import stream_question_data
+
+    return list(stream_question_data(data, workers=workers))
+
+
+# Job function: question data read from the CO/Marks columns of a tabular question paper
+def parse_question_paper_layout(data, file_name=None):
+    from pdf_layout import layout_question_data
+
+    return layout_question_data(data)
+
+
+# Job function: compact marks table of an uploaded workbook/CSV/Parquet file
+def parse_marks_file(data, file_name=None):
+    from marks_ingest import load_marks
+
+    return load_marks(io.BytesIO(data), file_name=file_name)
+
+
+JOB_KINDS = {
+    "questions": parse_question_paper,
+    "questions_layout": parse_question_paper_layout,
+    "student_workbook": parse_marks_file,
+}
+
+
+class QueueFull(Exception):
+    pass
+
+
+# Bounded pool of worker processes shared by all sessions of the server.  Jobs are
+# keyed by the content hash of the upload, so identical uploads from different
+# sessions share one job; sessions poll status() and collect result().
+class UploadJobQueue:
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        # Spawned workers never inherit the server's threads or Streamlit state
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.max_pending = max_pending
+        self._jobs = OrderedDict()  # job id -> Future
+        self._lock = threading.Lock()
+
+    # Queue a parse of `data` (or join the identical job already queued) and return its id
+    def submit(self, kind, data, file_name=None):
+        job_id = content_hash(data, kind)
+        with self._lock:
+            future = self._jobs.get(job_id)
+            if future is not None and not (future.done() and future.exception() is not None):
+                return job_id  # Pending, running or finished successfully
+
+            if self.pending_count() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} uploads are already waiting to be processed")
+
+            self._jobs[job_id] = self._executor.submit(JOB_KINDS[kind], data, file_name)
+            self._jobs.move_to_end(job_id)
+            self._forget_finished()
+        return job_id
+
+    # Function to report "pending", "running", "done", "failed" or "unknown" for a job
+    def status(self, job_id):
+        future = self._jobs.get(job_id)
+        if future is None:
+            return "unknown"
+        if future.running():
+            return "running"
+        if not future.done():
+            return "pending"
+        return "failed" if future.exception() is not None else "done"
+
+    # Function to return a finished job's result (re-raising the job's exception if it failed)
+    def result(self, job_id, timeout=None):
+        return self._jobs[job_id].result(timeout=timeout)
+
+    def pending_count(self):
+        return sum(1 for future in self._jobs.values() if not future.done())
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, future in self._jobs.items() if future.done()]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+# Function to get the process-wide job queue shared by all Streamlit sessions
+def default_queue():
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = UploadJobQueue()
+        return _default_queue
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from course_schema import ID_COLUMNS, QUESTION_COLUMN_PATTERN
+
+DEFAULT_CHUNK_ROWS = 10_000
+
+# Header row of each format: marks workbooks carry a title row above the header
+DEFAULT_HEADER_ROWS = {".xlsx": 1, ".xlsm": 1, ".xls": 1, ".csv": 0, ".parquet": 0}
+
+
+# Only the identity columns, the Q.n columns and an existing Total are ever read
+def is_marks_column(name):
+    name = str(name).strip()
+    return name in ID_COLUMNS or name == "Total" or QUESTION_COLUMN_PATTERN.match(name) is not None
+
+
+# Function to give a chunk compact dtypes: float32 scores and categorical names
+def compact_chunk(chunk):
+    chunk.columns = [str(column).strip() for column in chunk.columns]
+    for column in chunk.columns:
+        if column == "FirstName":
+            chunk[column] = chunk[column].astype("category")
+        elif column != "Enrollment_No":
+            chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype(np.float32)
+    return chunk
+
+
+# Generator yielding compact row chunks of an .xlsx workbook, reading it row by row
+def iter_xlsx_chunks(source, header=1, sheet_name=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet_name is None:
+            sheets = workbook.worksheets
+        elif isinstance(sheet_name, int):
+            sheets = [workbook.worksheets[sheet_name]]
+        else:
+            sheets = [workbook[sheet_name]]
+
+        for sheet in sheets:
+            rows = sheet.iter_rows(values_only=True)
+            for _ in range(header):
+                next(rows, None)
+            names = next(rows, None) or ()
+
+            # Positions of the columns we keep; everything else is never materialized
+            wanted = [(i, str(name).strip()) for i, name in enumerate(names)
+                      if name is not None and is_marks_column(name)]
+            columns = [name for _, name in wanted]
+
+            batch = []
+            for row in rows:
+                values = [row[i] if i < len(row) else None for i, _ in wanted]
+                if all(value is None for value in values):
+                    continue
+                batch.append(values)
+                if len(batch) >= chunk_rows:
+                    yield compact_chunk(pd.DataFrame(batch, columns=columns))
+                    batch = []
+            if batch or not columns:
+                yield compact_chunk(pd.DataFrame(batch, columns=columns))
+    finally:
+        workbook.close()
+
+
+# Generator yielding compact row chunks of a CSV file
+def iter_csv_chunks(source, header=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    names = pd.read_csv(source, header=header, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    # Marks columns keep the parser's own type: numbers as floats, a chunk with text such as
+    # "AB" (absent) as strings.  compact_chunk turns both into float32 with NaN for text,
+    # like the other formats, instead of failing the whole file.
+    dtype = {name: "string" for name in names if str(name).strip() in ID_COLUMNS}
+    for chunk in pd.read_csv(source, header=header, usecols=is_marks_column, dtype=dtype,
+                             chunksize=chunk_rows):
+        yield compact_chunk(chunk)
+
+
+# Generator yielding compact row chunks of a Parquet file, one record batch at a time
+def iter_parquet_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    columns = [name for name in parquet_file.schema_arrow.names if is_marks_column(name)]
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield compact_chunk(batch.to_pandas())
+
+
+# Generator yielding compact row chunks of a legacy .xls workbook (read whole by xlrd)
+def iter_xls_chunks(source, header=1, sheet_name=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    frames = pd.read_excel(source, header=header, sheet_name=sheet_name, usecols=is_marks_column)
+    for frame in (frames.values() if isinstance(frames, dict) else [frames]):
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            yield compact_chunk(frame.iloc[start:start + chunk_rows].copy())
+
+
+# Generator yielding the marks table of an .xlsx/.xls/.csv/.parquet file in row chunks
+def iter_marks_chunks(source, file_name=None, header=None, sheet_name=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    file_name = file_name or (source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", ""))
+    ext = os.path.splitext(str(file_name))[1].lower() or ".xlsx"
+    if header is None:
+        header = DEFAULT_HEADER_ROWS.get(ext, 0)
+
+    if ext == ".csv":
+        return iter_csv_chunks(source, header=header, chunk_rows=chunk_rows)
+    if ext == ".parquet":
+        return iter_parquet_chunks(source, chunk_rows=chunk_rows)
+    if ext == ".xls":
+        return iter_xls_chunks(source, header=header, sheet_name=sheet_name, chunk_rows=chunk_rows)
+    return iter_xlsx_chunks(source, header=header, sheet_name=sheet_name, chunk_rows=chunk_rows)
+
+
+# Function to load a whole marks table with only the required columns and compact dtypes
+def load_marks(source, file_name=None, header=None, sheet_name=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    chunks = list(iter_marks_chunks(source, file_name=file_name, header=header,
+                                    sheet_name=sheet_name, chunk_rows=chunk_rows))
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks, ignore_index=True)
+    if "FirstName" in df.columns:
+        # Categories differ between chunks, so concat falls back to object
+        df["FirstName"] = df["FirstName"].astype("category")
+    return df
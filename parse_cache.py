@@ -0,0 +1,211 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# Bump when the cached values change shape so old entries are ignored
+CACHE_VERSION = "2"
+
+DEFAULT_MEMORY_BYTES = int(os.environ.get("COPO_CACHE_MEMORY_MB", "64")) * 1024 * 1024
+DEFAULT_DISK_BYTES = int(os.environ.get("COPO_CACHE_DISK_MB", "512")) * 1024 * 1024
+DEFAULT_CACHE_DIR = os.environ.get("COPO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "copocalculator")) or None
+
+
+# Returned by lookup() when nothing is cached
+MISSING = object()
+
+
+# Function to hash uploaded file contents into a cache key
+def content_hash(data, kind=""):
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_VERSION}:{kind}:".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+# Two-tier cache of parsed uploads keyed by content hash: a size-bounded LRU in
+# memory in front of a size-bounded directory of pickles on disk.  Values are
+# stored pickled, so every hit hands back a fresh copy that callers may mutate.
+class ContentCache:
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, cache_dir=DEFAULT_CACHE_DIR,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # Running size of the disk tier, from one scan on first write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Return the cached value for `data`, or `default` without loading anything
+    def lookup(self, kind, data, default=None):
+        key = content_hash(data, kind)
+        payload = self._get_memory(key)
+        if payload is None:
+            payload = self._get_disk(key)
+            if payload is not None:
+                self._put_memory(key, payload)
+        if payload is not None:
+            try:
+                value = pickle.loads(payload)
+                self.hits += 1
+                return value
+            except Exception:
+                self.discard(key)
+        return default
+
+    # Store a value computed elsewhere (e.g. by a background job) for `data`
+    def put(self, kind, data, value):
+        key = content_hash(data, kind)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._put_memory(key, payload)
+        self._put_disk(key, payload)
+
+    # Return the cached value for `data`, calling `loader()` only on a miss
+    def get(self, kind, data, loader):
+        value = self.lookup(kind, data, MISSING)
+        if value is not MISSING:
+            return value
+
+        self.misses += 1
+        value = loader()
+        self.put(kind, data, value)
+        return value
+
+    # Remove one entry from both tiers
+    def discard(self, key):
+        with self._lock:
+            payload = self._memory.pop(key, None)
+            if payload is not None:
+                self._memory_bytes -= len(payload)
+        if self.cache_dir:
+            path = self._disk_path(key)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            with self._lock:
+                if self._disk_bytes is not None:
+                    self._disk_bytes -= size
+
+    # Empty the in-memory tier (the disk tier is left untouched)
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _get_memory(self, key):
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+            return payload
+
+    def _put_memory(self, key, payload):
+        if len(payload) > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = payload
+            self._memory_bytes += len(payload)
+
+            # Evict least recently used entries until the tier fits its budget
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".pkl")
+
+    def _get_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)  # Mark as recently used for disk eviction
+            return payload
+        except OSError:
+            return None
+
+    def _put_disk(self, key, payload):
+        if not self.cache_dir or len(payload) > self.max_disk_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        # Writes only update the running total; the directory is walked once on the
+        # first write and again only when the total goes over budget
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[1]
+            else:
+                self._disk_bytes += len(payload) - replaced
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    # Function to list the cached files as (mtime, size, path) with their total size
+    def _scan_disk(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    # Drop the least recently used files until the directory is back under 90% of its
+    # budget, so the following writes do not each trigger another scan.  The scan also
+    # picks up entries written by other processes sharing the directory.
+    def _evict_disk(self):
+        entries, total = self._scan_disk()
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache shared by all Streamlit sessions
+def default_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ContentCache()
+        return _default_cache
@@ -0,0 +1,176 @@
+import os
+import re
+
+from parse_cache import default_cache
+from pdf_stream import open_pdf
+from question_tokenizer import iter_page_questions
+
+# Header cells that mark the columns of a tabular question paper
+CO_HEADER_PATTERN = re.compile(r"^C\.?O\.?s?$", re.IGNORECASE)
+MARKS_HEADER_PATTERN = re.compile(r"^(Marks?|M)\.?$", re.IGNORECASE)
+NUMBER_HEADER_PATTERN = re.compile(r"^(Q|S|Sr)\.?\s*No\.?$|^Q\.?$", re.IGNORECASE)
+
+# Cell contents: a question number ("1", "1.", "Q.1"), CO numbers ("CO1, CO2" or "1") and a mark
+QUESTION_CELL_PATTERN = re.compile(r"^Q?\.?(\d+)[.)]?$")
+CO_CELL_PATTERN = re.compile(r"(?:CO)?(\d+)", re.IGNORECASE)
+MARK_CELL_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+PART_PATTERN = re.compile(r"^\(([a-z]|[ivx]+)\)$")
+
+# Words whose vertical centres are this close (in points) share a table row
+ROW_TOLERANCE = 3.0
+
+
+# Function to return the words of a page as (x0, y0, x1, y1, text, block_no, line_no) tuples
+def page_words(page):
+    return [tuple(word[:7]) for word in page.get_text("words")]
+
+
+# Function to read the word layout of a whole document, one list of words per page
+def document_words(data):
+    doc = open_pdf(data)
+    try:
+        return [page_words(doc.load_page(page_num)) for page_num in range(doc.page_count)]
+    finally:
+        doc.close()
+
+
+# Function to return the word layout of every page of a PDF path, bytes or file object.
+# The layouts of the whole document are cached as one entry under its content hash, so
+# re-parsing a paper (e.g. in another mode) never opens it in MuPDF.
+def page_layouts(source, cache=None):
+    cache = cache or default_cache()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            data = f.read()
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        data = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+    return cache.get("pdf_layout", data, lambda: document_words(data))
+
+
+# Function to group a page's words into rows by vertical position, each row sorted left to right
+def group_rows(words):
+    rows = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        centre = (word[1] + word[3]) / 2
+        if rows and centre - rows[-1][0] <= ROW_TOLERANCE:
+            rows[-1][1].append(word)
+        else:
+            rows.append([centre, [word]])
+    return [sorted(row_words) for _, row_words in rows]
+
+
+# Function to find the column layout in a header row: the left edges of the question
+# number, question text, CO and marks columns.  Returns None for any other row.
+def header_columns(row):
+    co = next((w for w in row if CO_HEADER_PATTERN.match(w[4])), None)
+    marks = next((w for w in row if MARKS_HEADER_PATTERN.match(w[4])), None)
+    if co is None or marks is None:
+        return None
+    number = next((w for w in row if NUMBER_HEADER_PATTERN.match(w[4]) and w[0] < co[0]), None)
+    if number is None:
+        return {'number': None, 'text': None, 'co': co[0], 'marks': marks[0]}
+    # The question text starts at the next header word, or right after the number column
+    text = next((w for w in row if number[2] <= w[0] < min(co[0], marks[0])
+                 and not w[4].lower().startswith("no")), None)
+    return {
+        'number': number[0],
+        'text': text[0] if text else number[2],
+        'co': co[0],
+        'marks': marks[0],
+    }
+
+
+# Function to split a row's words into cells using the header's column edges.  A word
+# belongs to the right-most column that starts left of its centre (with a little slack
+# for right-aligned cells).
+def split_cells(row, columns):
+    edges = sorted((x, name) for name, x in columns.items() if x is not None)
+    cells = {name: [] for _, name in edges}
+    cells.setdefault('text', [])
+    for word in row:
+        centre = (word[0] + word[2]) / 2
+        column = 'text'
+        for x, name in edges:
+            if centre >= x - 4:
+                column = name
+        cells[column].append(word)
+    return cells
+
+
+def _bbox(words):
+    return (min(w[0] for w in words), min(w[1] for w in words),
+            max(w[2] for w in words), max(w[3] for w in words))
+
+
+# Function to read question data from the rows of tabular pages.  Every row that opens
+# with a question number starts a question; the CO and marks cells of the rows below it
+# (sub-parts, wrapped text) belong to the same question.  Entries carry the page and
+# bounding box of their first row; with parts=True they also list their sub-parts.
+def questions_from_layouts(layouts, parts=False):
+    question_data = []
+    columns = None
+    question = None
+    part = None
+    for page_num, words in enumerate(layouts):
+        for row in group_rows(words):
+            found = header_columns(row)
+            if found is not None:
+                columns = found  # Repeated headers on later pages may shift the columns
+                continue
+            if columns is None:
+                continue  # Title block above the table
+
+            cells = split_cells(row, columns)
+            if columns['number'] is not None:
+                number = cells['number'][0][4] if cells['number'] else ""
+            else:
+                # Without a number column only explicit "Q.1" markers open a question
+                number = cells['text'][0][4] if cells['text'] and cells['text'][0][4].startswith("Q") else ""
+                if number:
+                    cells['text'] = cells['text'][1:]
+
+            if QUESTION_CELL_PATTERN.match(number):
+                question = {'question_number': len(question_data) + 1, 'cos': [], 'marks': 0.0,
+                            'page': page_num, 'bbox': _bbox(row)}
+                question_data.append(question)
+                part = None
+                if parts:
+                    question['parts'] = []
+            elif question is None:
+                continue
+
+            label = cells['text'][0][4] if cells['text'] else ""
+            if parts and (part is None or PART_PATTERN.match(label)):
+                match = PART_PATTERN.match(label)
+                part = {'part': match.group(1) if match else None, 'cos': [], 'marks': 0.0,
+                        'page': page_num, 'bbox': _bbox(row)}
+                question['parts'].append(part)
+
+            cos = [f"CO{n}" for w in cells['co'] for n in CO_CELL_PATTERN.findall(w[4])]
+            marks = sum(float(m) for w in cells['marks'] for m in MARK_CELL_PATTERN.findall(w[4]))
+            question['cos'] += cos
+            question['marks'] += marks
+            if parts:
+                part['cos'] += cos
+                part['marks'] += marks
+    return question_data, columns is not None
+
+
+# Function to rebuild a page's text from its words in extraction order, line by line
+def layout_text(words):
+    lines = {}
+    for word in words:
+        lines.setdefault((word[5], word[6]), []).append(word[4])
+    return "".join(" ".join(line) + "\n" for line in lines.values())
+
+
+# Function to extract question data from the table layout of a PDF path, bytes or file
+# object.  Papers without a CO/Marks table header fall back to the text tokenizer.
+def layout_question_data(source, parts=False, cache=None):
+    layouts = page_layouts(source, cache)
+    question_data, tabular = questions_from_layouts(layouts, parts)
+    if not tabular:
+        return list(iter_page_questions((layout_text(words) for words in layouts), parts))
+    return question_data
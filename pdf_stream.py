@@ -0,0 +1,148 @@
+import io
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF for reading PDFs
+
+from question_tokenizer import iter_page_questions
+
+
+def _open_stream(buffer):
+    try:
+        return fitz.open(stream=buffer, filetype="pdf")
+    except TypeError:
+        # Older PyMuPDF releases only take bytes
+        return fitz.open(stream=bytes(buffer), filetype="pdf")
+
+
+# Function to open a PDF without copying it into a Python bytes object where possible.
+# Paths are opened by MuPDF directly (or memory-mapped with use_mmap=True), in-memory
+# uploads are read through their buffer and real files through a memory map.
+def open_pdf(source, use_mmap=False):
+    if isinstance(source, (str, os.PathLike)):
+        if not use_mmap:
+            return fitz.open(source, filetype="pdf")
+        with open(source, "rb") as f:
+            return _open_stream(memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _open_stream(source)
+    if isinstance(source, io.BytesIO):
+        return _open_stream(source.getbuffer())
+    try:
+        return _open_stream(memoryview(mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)))
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return _open_stream(source.read())
+
+
+# Generator yielding the text of each page in order, closing the document at the end
+def iter_page_texts(doc):
+    try:
+        for page in doc:
+            yield page.get_text("text")
+    finally:
+        doc.close()
+
+
+# Function to extract the text of pages [start, stop) with the worker's own document handle
+def extract_page_range(source, start, stop):
+    doc = open_pdf(source)
+    try:
+        return [doc.load_page(page_num).get_text("text") for page_num in range(start, stop)]
+    finally:
+        doc.close()
+
+
+# Worker pools kept for the life of the process, keyed by their number of workers, so
+# extracting many documents does not start and tear down a pool for each one
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Function to start a pool of extraction processes.  They are spawned, never forked: the
+# app's server process runs several threads, and PyMuPDF must not run on more than one
+# thread of a process, so pages are only ever extracted in separate processes.
+def _new_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+# Function to get the pool with `workers` processes and whether it is shared.  Only the
+# main process keeps pools: a worker process of another pool (batch runner, background
+# jobs) is joined at exit together with its children, so it must not leave idle ones behind.
+def _get_pool(workers):
+    if multiprocessing.parent_process() is not None:
+        return _new_pool(workers), False
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = _new_pool(workers)
+        return pool, True
+
+
+def _discard_pool(workers, pool):
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False)
+
+
+# Generator yielding page texts in page order while worker processes extract page ranges
+# in parallel, each with its own fitz document.  Workers get a path to reopen: in-memory
+# PDFs are written once to a temporary file, so tasks pickle the path rather than a copy
+# of the document each.
+def iter_page_texts_parallel(source, workers=None, pages_per_task=None):
+    workers = workers or os.cpu_count() or 1
+    # Workers need something they can reopen: a path or an immutable bytes object
+    if isinstance(source, (bytearray, memoryview)):
+        source = bytes(source)
+    elif hasattr(source, 'getvalue'):
+        source = source.getvalue()
+    elif not isinstance(source, (str, os.PathLike, bytes)):
+        source = source.read()
+
+    doc = open_pdf(source)
+    page_count = doc.page_count
+    doc.close()
+
+    pages_per_task = pages_per_task or max(1, -(-page_count // (workers * 4)))
+    starts = list(range(0, page_count, pages_per_task))
+    stops = [min(start + pages_per_task, page_count) for start in starts]
+
+    temp_path = None
+    if isinstance(source, bytes):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(source)
+        source = temp_path = f.name
+
+    pool, shared = _get_pool(workers)
+    try:
+        # map() returns results in submission order, so pages come back in document order
+        for texts in pool.map(extract_page_range, [source] * len(starts), starts, stops):
+            yield from texts
+    except BrokenProcessPool:
+        if shared:
+            _discard_pool(workers, pool)  # A worker died; the next document gets a new pool
+        raise
+    finally:
+        if not shared:
+            pool.shutdown()
+        if temp_path is not None:
+            os.remove(temp_path)
+
+
+# Generator yielding question data entries one at a time from a stream of page texts.
+# A question that spans a page break is read exactly as in the joined document text.
+def iter_questions(page_texts, parts=False):
+    return iter_page_questions(page_texts, parts=parts)
+
+
+# Generator yielding question data entries straight from a PDF path, bytes or file object.
+# With workers > 1 the pages are extracted in parallel; the output is identical to the serial path.
+def stream_question_data(source, use_mmap=False, workers=1, parts=False):
+    if workers and workers > 1:
+        return iter_questions(iter_page_texts_parallel(source, workers=workers), parts)
+    return iter_questions(iter_page_texts(open_pdf(source, use_mmap=use_mmap)), parts)
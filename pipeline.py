@@ -0,0 +1,161 @@
+import hashlib
+import pickle
+import time
+
+from copo_compute import (
+    aggregate_marks_by_co,
+    generate_co_question_table,
+    generate_student_co_table,
+    generate_co_metrics_table,
+    generate_co_po_metrics_table,
+    calculate_attainment,
+    student_totals_row,
+)
+from course_schema import CourseSchema
+from incremental import sync_student_state
+
+# Values supplied from outside the graph: the parsed paper, the validated marks table
+# and the CO-PO mapping (with its averages)
+INPUTS = ("question_data", "student_data", "co_po_mapping")
+
+
+# Function to fingerprint a value: DataFrames by their hashed rows, index and columns,
+# anything else by its pickle
+def fingerprint(value):
+    digest = hashlib.sha256()
+    if hasattr(value, 'columns') and hasattr(value, 'index'):
+        from pandas.util import hash_pandas_object
+
+        digest.update(pickle.dumps((list(value.columns), value.index.name)))
+        digest.update(hash_pandas_object(value, index=True).to_numpy().tobytes())
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def _schema(question_data, student_data):
+    return CourseSchema.from_course(question_data, student_data.columns)
+
+
+def _totals(student_state):
+    return student_state.totals()
+
+
+def _co_question_table(co_marks, question_data, schema):
+    return generate_co_question_table(co_marks, question_data, schema)
+
+
+def _student_co_table(co_marks, question_data, totals, schema):
+    return generate_student_co_table(co_marks, question_data, schema.students_attempted(totals), schema)
+
+
+def _co_metrics_table(co_marks, student_co_df, totals, schema):
+    return generate_co_metrics_table(co_marks, student_co_df, totals['Total Students Appeared'], schema)
+
+
+# Stages of the attainment pipeline: name -> (function, upstream stages or inputs).  The
+# function is called with the upstream values in order.
+#   question_data -> co_marks -> co_question_table
+#   student_data -> student_state -> calculate_totals -> student_co_table (with co_marks) -> co_metrics_table
+#       -> co_po_metrics_table (with co_po_mapping) -> attainment
+# and the schema (from question_data and student_data) feeds every CO table.
+STAGES = {
+    "co_marks": (aggregate_marks_by_co, ("question_data",)),
+    "schema": (_schema, ("question_data", "student_data")),
+    "student_state": (sync_student_state, ("student_data",)),
+    "calculate_totals": (_totals, ("student_state",)),
+    "student_totals_row": (student_totals_row, ("student_data", "calculate_totals")),
+    "co_question_table": (_co_question_table, ("co_marks", "question_data", "schema")),
+    "student_co_table": (_student_co_table, ("co_marks", "question_data", "calculate_totals", "schema")),
+    "co_metrics_table": (_co_metrics_table, ("co_marks", "student_co_table", "calculate_totals", "schema")),
+    "co_po_metrics_table": (generate_co_po_metrics_table, ("co_po_mapping", "co_metrics_table")),
+    "attainment": (calculate_attainment, ("co_po_metrics_table", "co_po_mapping")),
+}
+
+# Stages that are also passed their own previous result (None on the first run) to update
+# instead of starting over: the running totals of the marks table only apply the rows
+# that changed since the last run (see incremental.IncrementalAttainment.sync)
+INCREMENTAL_STAGES = ("student_state",)
+
+
+# Memoized run of the stage graph.  Each stage's result is cached under a key made of
+# the fingerprints of its upstream values, and is recomputed only when that key
+# changes.  Results are fingerprinted by value, so a stage that recomputes to the same
+# result (e.g. the schema after editing one mark) leaves its downstream stages cached.
+# A stage with a missing input is skipped and returns None.
+#
+# `cache` is the {stage: entry} dict kept between runs (e.g. in a Streamlit session);
+# a Pipeline object itself covers one run with one set of inputs.
+class Pipeline:
+    def __init__(self, cache=None, recorder=None, stages=STAGES, incremental=INCREMENTAL_STAGES):
+        self.cache = {} if cache is None else cache
+        self.recorder = recorder
+        self.stages = stages
+        self.incremental = incremental
+        self.inputs = {}  # input name -> (fingerprint, value)
+        self.status = {}  # stage -> "cached", "computed" or "skipped" in this run
+
+    # Set one input of this run; None marks it as missing
+    def set_input(self, name, value, value_fingerprint=None):
+        if value is None:
+            self.inputs.pop(name, None)
+        else:
+            self.inputs[name] = (value_fingerprint or fingerprint(value), value)
+
+    # Function to return the value of a stage or input (None when an input is missing)
+    def get(self, name):
+        resolved = self._resolve(name)
+        return None if resolved is None else resolved[1]
+
+    def _resolve(self, name):
+        if name not in self.stages:
+            return self.inputs.get(name)
+
+        function, upstream = self.stages[name]
+        resolved = [self._resolve(dependency) for dependency in upstream]
+        if any(value is None for value in resolved):
+            self.status[name] = "skipped"
+            return None
+
+        key = hashlib.sha256(":".join([name] + [fp for fp, _ in resolved]).encode()).hexdigest()
+        entry = self.cache.get(name)
+        if entry is not None and entry['key'] == key:
+            if self.status.get(name) != "computed":
+                self.status[name] = "cached"
+            return entry['fingerprint'], entry['value']
+
+        args = [value for _, value in resolved]
+        if name in self.incremental:
+            args.insert(0, entry['value'] if entry is not None else None)
+        start = time.perf_counter()
+        if self.recorder is not None:
+            with self.recorder.stage(name):
+                value = function(*args)
+        else:
+            value = function(*args)
+        self.cache[name] = {
+            'key': key,
+            'fingerprint': fingerprint(value),
+            'value': value,
+            'runs': (entry or {}).get('runs', 0) + 1,
+            'seconds': time.perf_counter() - start,
+        }
+        self.status[name] = "computed"
+        return self.cache[name]['fingerprint'], value
+
+    # Function to describe the cache for debugging: one row per input and stage
+    def describe(self):
+        rows = [{'stage': name, 'upstream': "", 'status': "input" if name in self.inputs else "missing",
+                 'fingerprint': self.inputs[name][0][:12] if name in self.inputs else "", 'runs': None,
+                 'seconds': None} for name in INPUTS]
+        for name, (_, upstream) in self.stages.items():
+            entry = self.cache.get(name, {})
+            rows.append({
+                'stage': name,
+                'upstream': ", ".join(upstream),
+                'status': self.status.get(name, "not requested"),
+                'fingerprint': entry.get('fingerprint', "")[:12],
+                'runs': entry.get('runs', 0),
+                'seconds': entry.get('seconds'),
+            })
+        return rows
@@ -0,0 +1,109 @@
+import re
+
+# One alternation for the tokens of a question paper, compiled once at import: question
+# markers, CO tags and [marks].  Every match fills exactly one group, so a match reads as
+# a (question, co, marks) tuple.  The lookahead rejects every other position on its first
+# character before any branch is tried.
+TOKEN_PATTERN = re.compile(
+    r"(?=[QC\[])(?:"
+    r"(?P<question>Q\.\d+)"
+    r"|(?P<co>CO\d+)"
+    r"|\[(?P<marks>\d+(?:\.\d+)?)\]"
+    r")"
+)
+
+# The same tokens plus sub-part labels such as (a) or (iv), read as (question, co, marks, part)
+# tuples; only used with parts=True, so plain parses never try the label branch
+PART_TOKEN_PATTERN = re.compile(
+    r"(?=[QC\[(])(?:"
+    r"(?P<question>Q\.\d+)"
+    r"|(?P<co>CO\d+)"
+    r"|\[(?P<marks>\d+(?:\.\d+)?)\]"
+    r"|\((?P<part>[a-z]|[ivx]+)\)"
+    r")"
+)
+
+# Function to return the token tuples of `text` in one scan (with sub-part labels if `parts`)
+def tokenize(text, parts=False):
+    return (PART_TOKEN_PATTERN if parts else TOKEN_PATTERN).findall(text)
+
+
+# Generator yielding the token tuples of a stream of page texts.  Tokens split by a
+# page break are read exactly as in the joined text: no token contains whitespace, so
+# everything up to a page's last space or line break is scanned at once and only the
+# word after it is carried over to the next page.
+def iter_page_tokens(page_texts, parts=False):
+    pattern = PART_TOKEN_PATTERN if parts else TOKEN_PATTERN
+    buffer = ""
+    for text in page_texts:
+        buffer += text
+        cut = max(buffer.rfind(" "), buffer.rfind("\n")) + 1
+        yield from pattern.findall(buffer, 0, cut)
+        buffer = buffer[cut:]
+    yield from pattern.findall(buffer)
+
+
+# State machine turning tokens into question data.  Every question gets the
+# question_number, COs and total marks that extract_question_data always returned;
+# with parts=True (and tokens from PART_TOKEN_PATTERN) it also lists its sub-parts,
+# each with its own COs and marks (the part labelled None is the question stem before
+# the first sub-part).
+def iter_questions_from_tokens(tokens, parts=False):
+    if parts:
+        return _iter_questions_with_parts(tokens)
+    return _iter_questions(tokens)
+
+
+def _iter_questions(tokens):
+    question = None
+    number = 0
+    for question_token, co, marks in tokens:
+        if question_token:
+            if question is not None:
+                yield question
+            number += 1
+            question = {'question_number': number, 'cos': [], 'marks': 0.0}
+        elif question is None:
+            continue  # Text before the first question
+        elif co:
+            question['cos'].append(co)
+        else:
+            question['marks'] += float(marks)
+    if question is not None:
+        yield question
+
+
+def _iter_questions_with_parts(tokens):
+    question = None
+    part = None
+    number = 0
+    for question_token, co, marks, label in tokens:
+        if question_token:
+            if question is not None:
+                yield question
+            number += 1
+            part = {'part': None, 'cos': [], 'marks': 0.0}
+            question = {'question_number': number, 'cos': [], 'marks': 0.0, 'parts': [part]}
+        elif question is None:
+            continue  # Text before the first question
+        elif co:
+            question['cos'].append(co)
+            part['cos'].append(co)
+        elif marks:
+            question['marks'] += float(marks)
+            part['marks'] += float(marks)
+        else:
+            part = {'part': label, 'cos': [], 'marks': 0.0}
+            question['parts'].append(part)
+    if question is not None:
+        yield question
+
+
+# Function to parse the question data of a paper's full text
+def tokenize_questions(text, parts=False):
+    return list(iter_questions_from_tokens(tokenize(text, parts), parts))
+
+
+# Generator yielding question data as page texts arrive
+def iter_page_questions(page_texts, parts=False):
+    return iter_questions_from_tokens(iter_page_tokens(page_texts, parts), parts)
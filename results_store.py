@@ -0,0 +1,233 @@
+import argparse
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from attainment_core import nan_mean
+
+GROUP_COLUMNS = ("academic_year", "batch", "semester")
+
+# Columns identifying one offering of a course: the same course saved for another
+# program, academic year, batch or semester is stored alongside the earlier results
+OFFERING_COLUMNS = ("course_id", "program") + GROUP_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    offering_id INTEGER PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    program TEXT,
+    academic_year TEXT,
+    batch TEXT,
+    semester TEXT,
+    attainment REAL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_courses_offering ON courses (course_id, program, academic_year, batch, semester);
+CREATE INDEX IF NOT EXISTS idx_courses_program_year ON courses (program, academic_year);
+CREATE INDEX IF NOT EXISTS idx_courses_program_batch_semester ON courses (program, batch, semester);
+
+CREATE TABLE IF NOT EXISTS co_metrics (
+    offering_id INTEGER NOT NULL,
+    co TEXT NOT NULL,
+    weighted REAL,
+    metric_1 REAL,
+    metric_2 REAL,
+    PRIMARY KEY (offering_id, co)
+);
+
+CREATE TABLE IF NOT EXISTS co_po_metrics (
+    offering_id INTEGER NOT NULL,
+    co TEXT NOT NULL,
+    po TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (offering_id, co, po)
+);
+
+-- One row per course offering and PO: its contribution to program-level PO attainment
+CREATE TABLE IF NOT EXISTS course_po (
+    offering_id INTEGER NOT NULL,
+    po TEXT NOT NULL,
+    metric_average REAL,
+    mapping_average REAL,
+    PRIMARY KEY (offering_id, po)
+);
+CREATE INDEX IF NOT EXISTS idx_course_po_po ON course_po (po);
+"""
+
+# Value columns of the per-offering result tables
+RESULT_COLUMNS = {
+    "co_metrics": "co, weighted, metric_1, metric_2",
+    "co_po_metrics": "co, po, value",
+    "course_po": "po, metric_average, mapping_average",
+}
+
+
+# Function to move a store keyed by course_id alone (one offering per course) to offering
+# ids, in one transaction
+def _migrate_course_keys(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(courses)")]
+    if not columns or "offering_id" in columns:
+        return
+    tables = ("courses",) + tuple(RESULT_COLUMNS)
+    script = ["BEGIN;"]
+    script += [f"ALTER TABLE {table} RENAME TO old_{table};" for table in tables]
+    script += [f"DROP INDEX IF EXISTS {index};"
+               for index in ("idx_courses_program_year", "idx_courses_program_batch_semester", "idx_course_po_po")]
+    script.append(SCHEMA)
+    script.append("INSERT INTO courses SELECT rowid, course_id, program, academic_year, batch, semester, "
+                  "attainment, updated_at FROM old_courses;")
+    script += [f"INSERT INTO {table} SELECT c.rowid, {', '.join('t.' + c for c in values.split(', '))} "
+               f"FROM old_{table} t JOIN old_courses c ON c.course_id = t.course_id;"
+               for table, values in RESULT_COLUMNS.items()]
+    script += [f"DROP TABLE old_{table};" for table in tables]
+    script.append("COMMIT;")
+    conn.executescript("\n".join(script))
+
+
+# Function to open (and create if needed) a results store
+def open_store(path):
+    conn = sqlite3.connect(path, timeout=30)
+    _migrate_course_keys(conn)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _nullable(value):
+    return None if value is None or pd.isna(value) else float(value)
+
+
+# Function to find the offering id of (course_id, program, academic_year, batch, semester);
+# IS matches missing (NULL) values too
+def _offering_id(conn, key):
+    row = conn.execute(
+        f"SELECT offering_id FROM courses WHERE {' AND '.join(c + ' IS ?' for c in OFFERING_COLUMNS)}", key,
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+# Function to save one offering of a course (course, program, academic year, batch and
+# semester), replacing anything stored for that offering before
+def save_course_results(conn, course_id, co_metrics_df, co_po_metrics_df, co_po_mapping, attainment,
+                        program=None, academic_year=None, batch=None, semester=None):
+    metrics = co_po_metrics_df.drop(index='Average', columns='Average', errors='ignore').astype(float)
+    mapping = (co_po_mapping.drop(index='Average', columns='Average', errors='ignore').astype(float)
+               .reindex(index=metrics.index, columns=metrics.columns))
+
+    # PO contribution: mean CO-PO metric and mean mapping value over the COs mapped to the PO
+    metric_averages = nan_mean(metrics.to_numpy(), axis=0)
+    mapping_averages = nan_mean(np.where(metrics.notna(), mapping.to_numpy(), np.nan), axis=0)
+
+    key = (course_id, program, academic_year, batch, semester)
+    with conn:
+        offering_id = _offering_id(conn, key)
+        if offering_id is None:
+            offering_id = conn.execute(
+                "INSERT INTO courses (course_id, program, academic_year, batch, semester) VALUES (?, ?, ?, ?, ?)",
+                key,
+            ).lastrowid
+        for table in RESULT_COLUMNS:
+            conn.execute(f"DELETE FROM {table} WHERE offering_id = ?", (offering_id,))
+        conn.execute(
+            "UPDATE courses SET attainment = ?, updated_at = ? WHERE offering_id = ?",
+            (_nullable(attainment), datetime.now(timezone.utc).isoformat(timespec="seconds"), offering_id),
+        )
+        conn.executemany(
+            "INSERT INTO co_metrics VALUES (?, ?, ?, ?, ?)",
+            [(offering_id, row[0], _nullable(row[1]), _nullable(row[2]), _nullable(row[3]))
+             for row in co_metrics_df[['CO', 'Sum of (Marks * No. of Students)', 'Metric 1', 'Metric 2']]
+             .itertuples(index=False)],
+        )
+        conn.executemany(
+            "INSERT INTO co_po_metrics VALUES (?, ?, ?, ?)",
+            [(offering_id, co, po, float(value)) for (co, po), value in metrics.stack().dropna().items()],
+        )
+        conn.executemany(
+            "INSERT INTO course_po VALUES (?, ?, ?, ?)",
+            [(offering_id, po, _nullable(m), _nullable(p))
+             for po, m, p in zip(metrics.columns, metric_averages, mapping_averages)],
+        )
+
+
+# Function to remove one offering of a course and its contribution from the store
+def delete_course(conn, course_id, program=None, academic_year=None, batch=None, semester=None):
+    with conn:
+        offering_id = _offering_id(conn, (course_id, program, academic_year, batch, semester))
+        if offering_id is None:
+            return
+        for table in RESULT_COLUMNS:
+            conn.execute(f"DELETE FROM {table} WHERE offering_id = ?", (offering_id,))
+        conn.execute("DELETE FROM courses WHERE offering_id = ?", (offering_id,))
+
+
+def _po_number(po):
+    match = re.search(r"\d+", str(po))
+    return int(match.group()) if match else 0
+
+
+# Function to compute program-wide PO attainment, optionally filtered and grouped by
+# academic year, batch and/or semester.  Attainment of a PO is the mean CO-PO metric
+# over the mean mapping value across all courses contributing to it, as a percentage.
+def program_po_attainment(conn, program, group_by=(), **filters):
+    unknown = [c for c in list(group_by) + list(filters) if c not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown grouping/filter columns: {', '.join(unknown)}")
+
+    where = ["c.program = ?"]
+    params = [program]
+    for column, value in filters.items():
+        if value is not None:
+            where.append(f"c.{column} = ?")
+            params.append(value)
+    groups = [f"c.{column}" for column in group_by]
+
+    query = f"""
+        SELECT {''.join(g + ', ' for g in groups)}p.po AS po,
+               COUNT(DISTINCT c.offering_id) AS courses,
+               AVG(p.metric_average) AS metric_average,
+               AVG(p.mapping_average) AS mapping_average
+        FROM courses c JOIN course_po p ON p.offering_id = c.offering_id
+        WHERE {' AND '.join(where)} AND p.metric_average IS NOT NULL
+        GROUP BY {''.join(g + ', ' for g in groups)}p.po
+    """
+    df = pd.read_sql_query(query, conn, params=params)
+    df['attainment'] = df['metric_average'] / df['mapping_average'].where(df['mapping_average'] > 0) * 100
+    df['po_number'] = df['po'].map(_po_number)
+    return df.sort_values(list(group_by) + ['po_number']).drop(columns='po_number').reset_index(drop=True)
+
+
+# Function to list the stored course attainments of a program
+def program_courses(conn, program, **filters):
+    where = ["program = ?"]
+    params = [program]
+    for column, value in filters.items():
+        if column not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown filter column: {column}")
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    return pd.read_sql_query(f"SELECT * FROM courses WHERE {' AND '.join(where)} "
+                             "ORDER BY course_id, academic_year, batch, semester", conn, params=params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Program-level PO attainment from stored course results.")
+    parser.add_argument("db", help="Results store (SQLite file)")
+    parser.add_argument("--program", required=True)
+    parser.add_argument("--academic-year")
+    parser.add_argument("--batch")
+    parser.add_argument("--semester")
+    parser.add_argument("--group-by", nargs="*", default=[], choices=GROUP_COLUMNS)
+    args = parser.parse_args(argv)
+
+    conn = open_store(args.db)
+    filters = {"academic_year": args.academic_year, "batch": args.batch, "semester": args.semester}
+    print(program_po_attainment(conn, args.program, group_by=args.group_by, **filters).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())